@@ -3,19 +3,134 @@ import cv2
 import numpy as np
 import pytesseract
 import re
+import os
 import json
-from typing import List, Dict
+import hashlib
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from itertools import repeat
+from typing import List, Dict, Optional, Tuple
+from cache import ResultCache
+from storage import write_json_atomic
+
+#shared ocr pool, reused across cards and sheets
+_ocr_pool = None
+_ocr_pool_lock = threading.Lock()
+
+#one ocr engine per worker thread/process
+_ocr_local = threading.local()
+
+#on-disk ocr result cache, shared by every sheet in the process
+_ocr_cache = None
+_ocr_cache_lock = threading.Lock()
+
+#ocr backend that runs the tesseract binary once per call (writes a temp image, reloads language data)
+class PytesseractBackend:
+    name = 'pytesseract'
+    
+    def __init__(self, config: Dict):
+        self.lang = config.get('ocr_language', 'eng')
+        tesseract_path = config.get('tesseract_path')
+        if tesseract_path and os.path.exists(tesseract_path):
+            pytesseract.pytesseract.tesseract_cmd = tesseract_path
+    
+    def image_to_string(self, image, psm: Optional[int] = None) -> str:
+        ocr_config = f'--psm {psm}' if psm is not None else ''
+        return pytesseract.image_to_string(image, lang=self.lang, config=ocr_config)
+    
+    #text plus mean word confidence (0-100) from a single tesseract run
+    def recognize(self, image, psm: Optional[int] = None) -> Tuple[str, float]:
+        ocr_config = f'--psm {psm}' if psm is not None else ''
+        data = pytesseract.image_to_data(image, lang=self.lang, config=ocr_config,
+                                         output_type=pytesseract.Output.DICT)
+        
+        #rebuild the text from words, one line per tesseract line, blank line between blocks
+        lines = {}
+        confidences = []
+        for i, word in enumerate(data['text']):
+            if not word.strip():
+                continue
+            key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(key, []).append(word)
+            confidences.append(float(data['conf'][i]))
+        
+        text_lines = []
+        last_block = None
+        for key, words in lines.items():
+            if last_block is not None and key[0] != last_block:
+                text_lines.append('')
+            text_lines.append(' '.join(words))
+            last_block = key[0]
+        
+        confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        return '\n'.join(text_lines) + '\n', confidence
+
+#long-lived in-process tesseract engine, language data is loaded once and reused across cards and sheets
+class TesserocrBackend:
+    name = 'tesserocr'
+    
+    def __init__(self, config: Dict):
+        import tesserocr
+        self.lang = config.get('ocr_language', 'eng')
+        self._api = tesserocr.PyTessBaseAPI(lang=self.lang)
+    
+    def image_to_string(self, image, psm: Optional[int] = None) -> str:
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        #3 is tesseract's default fully automatic page segmentation
+        self._api.SetPageSegMode(psm if psm is not None else 3)
+        self._api.SetImage(image)
+        return self._api.GetUTF8Text()
+    
+    #text plus mean word confidence (0-100), confidence comes from the same recognition pass
+    def recognize(self, image, psm: Optional[int] = None) -> Tuple[str, float]:
+        text = self.image_to_string(image, psm)
+        return text, float(self._api.MeanTextConf())
+
+OCR_BACKENDS = {
+    'pytesseract': PytesseractBackend,
+    'tesserocr': TesserocrBackend
+}
+
+#backends that failed to start, so the fallback is reported once per process rather than per worker
+_ocr_unavailable = set()
+
+#get this worker's ocr engine, created on first use
+#falls back to pytesseract if the configured engine can't start
+def get_ocr_backend(config: Dict):
+    name = config.get('ocr_backend', 'pytesseract')
+    backends = getattr(_ocr_local, 'backends', None)
+    if backends is None:
+        backends = _ocr_local.backends = {}
+    
+    if name not in backends:
+        try:
+            backends[name] = OCR_BACKENDS[name](config)
+        except Exception as e:
+            if name not in _ocr_unavailable:
+                _ocr_unavailable.add(name)
+                print(f"ocr backend {name} unavailable ({e}), falling back to pytesseract")
+            backends[name] = PytesseractBackend(config)
+    
+    return backends[name]
 
 #load and split 3x3 card grid from scan
 def load_and_split_scan(image_path: str, grid_size: int = 3) -> List[np.ndarray]:
     img_cv = cv2.imread(image_path)
     img_rgb = cv2.cvtColor(img_cv, cv2.COLOR_BGR2RGB)
     
-    height, width, _ = img_rgb.shape
+    cropped_cards = split_grid(img_rgb, grid_size)
+    
+    print(f"split {len(cropped_cards)} cards from scan")
+    return cropped_cards
+
+#slice a sheet into grid cells, cells are views into the sheet (no copies)
+def split_grid(sheet: np.ndarray, grid_size: int = 3) -> List[np.ndarray]:
+    height, width = sheet.shape[:2]
     card_width = width // grid_size
     card_height = height // grid_size
     
-    cropped_cards = []
+    cells = []
     for row in range(grid_size):
         for col in range(grid_size):
             x1 = col * card_width
@@ -23,11 +138,126 @@ def load_and_split_scan(image_path: str, grid_size: int = 3) -> List[np.ndarray]
             y1 = row * card_height
             y2 = (row + 1) * card_height
             
-            card = img_rgb[y1:y2, x1:x2]
-            cropped_cards.append(card)
+            cells.append(sheet[y1:y2, x1:x2])
     
-    print(f"split {len(cropped_cards)} cards from scan")
-    return cropped_cards
+    return cells
+
+#lookup table doing invert + threshold in one step: same result as enhance_card on a grayscale value
+def build_threshold_lut(threshold: int = 140) -> np.ndarray:
+    inverted = 255 - np.arange(256)
+    return np.where(inverted < threshold, 0, 255).astype(np.uint8)
+
+#decode the scan straight to grayscale
+def load_gray_sheet(image_path: str) -> np.ndarray:
+    gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise FileNotFoundError(f"could not read scan {image_path}")
+    return gray
+
+#tiff scans can hold several binder pages
+def is_tiff(image_path: str) -> bool:
+    return image_path.lower().endswith(('.tif', '.tiff'))
+
+#number of pages in a scan, only multi-page tiffs have more than one
+def count_scan_pages(image_path: str) -> int:
+    if not is_tiff(image_path):
+        return 1
+    
+    import tifffile
+    with tifffile.TiffFile(image_path) as tif:
+        return len(tif.pages)
+
+#scale one strip of samples to 8 bits: bilevel pages are 0/255, integer samples keep their top 8 bits,
+#float samples are taken as 0-1
+def samples_to_uint8(strip: np.ndarray) -> np.ndarray:
+    if strip.dtype == np.uint8:
+        return strip
+    if strip.dtype == np.bool_:
+        return strip.astype(np.uint8) * 255
+    if strip.dtype == np.uint16:
+        return (strip >> 8).astype(np.uint8)
+    if np.issubdtype(strip.dtype, np.unsignedinteger):
+        return (strip >> (strip.dtype.itemsize * 8 - 8)).astype(np.uint8)
+    if np.issubdtype(strip.dtype, np.floating):
+        return (np.clip(strip, 0, 1) * 255 + 0.5).astype(np.uint8)
+    raise ValueError(f"unsupported sample type {strip.dtype}")
+
+#convert a page to 8-bit grayscale a strip of rows at a time
+#with a memory-mapped page only one strip of the color data is ever in memory
+#pages are (rows, cols) or (rows, cols, samples): 1-2 samples are gray (+ alpha), 3-4 are rgb(a)
+def page_to_gray(page: np.ndarray, strip_rows: int = 1024) -> np.ndarray:
+    if page.ndim == 2 and page.dtype == np.uint8:
+        return page
+    if page.ndim not in (2, 3) or (page.ndim == 3 and page.shape[2] > 4):
+        raise ValueError(f"unsupported page shape {page.shape}")
+    
+    gray = np.empty(page.shape[:2], dtype=np.uint8)
+    for y in range(0, page.shape[0], strip_rows):
+        strip = samples_to_uint8(np.asarray(page[y:y + strip_rows]))
+        if strip.ndim == 3 and strip.shape[2] >= 3:
+            #tiff samples are rgb(a), not opencv's bgr
+            strip = cv2.cvtColor(np.ascontiguousarray(strip[..., :3]), cv2.COLOR_RGB2GRAY)
+        elif strip.ndim == 3:
+            strip = strip[..., 0]
+        gray[y:y + strip_rows] = strip
+    
+    return gray
+
+#grayscale copy of one page of a scan, only that page is ever loaded
+#uncompressed tiff pages are memory-mapped so pixels are read from disk as cells are sliced,
+#compressed pages are decoded one page at a time
+#gray, bilevel and rgb pages are read (planar or interleaved, min-is-white inverted), palette/cmyk/etc are rejected
+def load_gray_page(image_path: str, page_index: int = 0) -> np.ndarray:
+    if not is_tiff(image_path):
+        if page_index:
+            raise ValueError(f"{image_path} has a single page, asked for page {page_index + 1}")
+        return load_gray_sheet(image_path)
+    
+    import tifffile
+    with tifffile.TiffFile(image_path) as tif:
+        tiff_page = tif.pages[page_index]
+        photometric = tiff_page.photometric
+        planar = tiff_page.samplesperpixel > 1 and tiff_page.planarconfig == tifffile.PLANARCONFIG.SEPARATE
+        if photometric not in (tifffile.PHOTOMETRIC.MINISBLACK, tifffile.PHOTOMETRIC.MINISWHITE,
+                               tifffile.PHOTOMETRIC.RGB):
+            raise ValueError(f"{image_path} page {page_index + 1}: unsupported tiff color type "
+                             f"{tifffile.PHOTOMETRIC(photometric).name}, save it as gray or rgb")
+        
+        try:
+            page = tifffile.memmap(image_path, page=page_index, mode='r')
+        except ValueError:
+            page = tiff_page.asarray()
+    
+    #separate planes come back as (samples, rows, cols)
+    if planar:
+        page = np.moveaxis(page, 0, -1)
+    
+    gray = page_to_gray(page)
+    if photometric == tifffile.PHOTOMETRIC.MINISWHITE:
+        gray = 255 - gray
+    return gray
+
+#decode the scan straight to grayscale and binarize the whole sheet once
+def preprocess_sheet(image_path: str, threshold: int = 140) -> np.ndarray:
+    return cv2.LUT(load_gray_sheet(image_path), build_threshold_lut(threshold))
+
+#binarize a grayscale card with a numeric threshold, otsu, or local adaptive thresholding
+#output polarity matches enhance_card: ink is white
+def binarize_card(card_gray: np.ndarray, method) -> np.ndarray:
+    if method == 'otsu':
+        _, binary = cv2.threshold(card_gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        return binary
+    if method == 'adaptive':
+        return cv2.adaptiveThreshold(card_gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                     cv2.THRESH_BINARY_INV, 31, 10)
+    return cv2.LUT(card_gray, build_threshold_lut(int(method)))
+
+#load, binarize and split a scan into ocr-ready cells
+def load_and_split_enhanced(image_path: str, grid_size: int = 3, threshold: int = 140) -> List[np.ndarray]:
+    sheet = preprocess_sheet(image_path, threshold)
+    cells = split_grid(sheet, grid_size)
+    print(f"split {len(cells)} cards from scan")
+    return cells
 
 #enhance card image for better ocr
 def enhance_card(card_pil: Image, threshold: int = 140) -> Image:
@@ -36,16 +266,186 @@ def enhance_card(card_pil: Image, threshold: int = 140) -> Image:
     enhanced = inverted.point(lambda x: 0 if x < threshold else 255)
     return enhanced
 
+#fields that count as missing when empty or with no letters/digits (ocr junk like "—_—")
+def missing_fields(card: Dict, fields: List[str]) -> List[str]:
+    return [f for f in fields if not re.search(r'[A-Za-z0-9]', str(card.get(f, '')))]
+
+#row bands (start, end) of text lines, from the horizontal ink profile of a binarized card
+def find_text_lines(card_enhanced: np.ndarray, min_ink: float = 0.005, min_height: int = 3) -> List[Tuple[int, int]]:
+    row_ink = np.count_nonzero(card_enhanced, axis=1)
+    is_text = (row_ink > card_enhanced.shape[1] * min_ink).astype(np.int8)
+    
+    edges = np.diff(np.concatenate(([0], is_text, [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    
+    return [(int(s), int(e)) for s, e in zip(starts, ends) if e - s >= min_height]
+
+#header band (name, team/position, bio lines) and footer band (copyright/code lines) of a card back
+#None when the card doesn't have enough distinct text lines to tell them apart
+def find_header_footer_bands(card_enhanced: np.ndarray, header_lines: int = 4,
+                             footer_lines: int = 5) -> Optional[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    lines = find_text_lines(card_enhanced)
+    if len(lines) < header_lines + footer_lines:
+        return None
+    
+    height = card_enhanced.shape[0]
+    pad = max(2, int(np.median([e - s for s, e in lines]) // 2))
+    header = (max(0, lines[0][0] - pad), min(height, lines[header_lines - 1][1] + pad))
+    footer = (max(0, lines[-footer_lines][0] - pad), min(height, lines[-1][1] + pad))
+    return header, footer
+
+#read one image, with the mean word confidence only when asked for (-1 otherwise)
+def _read_image(backend, image: np.ndarray, psm: Optional[int], with_confidence: bool) -> Tuple[str, float]:
+    if with_confidence:
+        return backend.recognize(image, psm)
+    return backend.image_to_string(image, psm), -1.0
+
+#ocr only the header and footer bands, each with its own page segmentation mode
+#returns None when a required field is still missing so the caller can fall back to the full card
+def ocr_card_regions(card_enhanced: np.ndarray, backend, config: Dict,
+                     with_confidence: bool = False) -> Optional[Tuple[str, float]]:
+    bands = find_header_footer_bands(card_enhanced, config['roi_header_lines'], config['roi_footer_lines'])
+    if bands is None:
+        return None
+    
+    (h1, h2), (f1, f2) = bands
+    header_text, header_conf = _read_image(backend, card_enhanced[h1:h2], config['roi_header_psm'], with_confidence)
+    footer_text, footer_conf = _read_image(backend, card_enhanced[f1:f2], config['roi_footer_psm'], with_confidence)
+    text = f"{header_text.rstrip()}\n\n{footer_text}"
+    
+    if missing_fields(parse_card_metadata(text, 0, {}), config['required_fields']):
+        return None
+    return text, (header_conf + footer_conf) / 2
+
+#one ocr pass over a binarized card: header/footer bands when enabled and good enough, else the whole card
+def ocr_card_pass(card_enhanced: np.ndarray, backend, config: Dict,
+                  with_confidence: bool = False) -> Tuple[str, float]:
+    if config.get('ocr_roi'):
+        result = ocr_card_regions(card_enhanced, backend, config, with_confidence)
+        if result is not None:
+            return result
+    
+    return _read_image(backend, card_enhanced, None, with_confidence)
+
+#run ocr on a card that is already enhanced (see preprocess_sheet)
+def ocr_enhanced_card(card_enhanced: np.ndarray, config: Optional[Dict] = None) -> str:
+    config = config or {}
+    backend = get_ocr_backend(config)
+    return ocr_card_pass(card_enhanced, backend, config)[0]
+
+#run ocr on a grayscale card, trying binarizations in order until one reads well
+#a pass is good enough once word confidence clears adaptive_min_confidence and no required field is missing,
+#so clean cards cost one pass and only hard cards pay for retries
+def ocr_gray_card_adaptive(card_gray: np.ndarray, config: Dict) -> str:
+    backend = get_ocr_backend(config)
+    methods = [config['image_enhance_threshold']]
+    methods += [m for m in config['adaptive_methods'] if str(m) != str(config['image_enhance_threshold'])]
+    
+    best_score = None
+    best_text = ''
+    for method in methods:
+        text, confidence = ocr_card_pass(binarize_card(card_gray, method), backend, config, with_confidence=True)
+        missing = missing_fields(parse_card_metadata(text, 0, {}), config['required_fields'])
+        
+        score = (-len(missing), confidence)
+        if best_score is None or score > best_score:
+            best_score = score
+            best_text = text
+        
+        if not missing and confidence >= config['adaptive_min_confidence']:
+            break
+    
+    return best_text
+
 #run ocr on single card
-def extract_text_from_card(card_rgb: np.ndarray, enhance_threshold: int = 140) -> str:
+def extract_text_from_card(card_rgb: np.ndarray, enhance_threshold: int = 140, config: Optional[Dict] = None) -> str:
     card_pil = Image.fromarray(card_rgb)
     card_enhanced = enhance_card(card_pil, enhance_threshold)
-    text = pytesseract.image_to_string(card_enhanced)
+    backend = get_ocr_backend(config or {})
+    text = backend.image_to_string(card_enhanced)
     return text
 
+#get (or lazily start) the shared ocr worker pool
+#threads are enough for pytesseract since each call runs in its own tesseract subprocess,
+#processes also parallelize the python-side image work
+def get_ocr_pool(config: Dict) -> Executor:
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            workers = max(1, config.get('ocr_workers') or os.cpu_count() or 1)
+            if config.get('ocr_pool') == 'process':
+                _ocr_pool = ProcessPoolExecutor(max_workers=workers)
+            else:
+                _ocr_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ocr')
+            print(f"started ocr {config.get('ocr_pool', 'thread')} pool with {workers} workers")
+        return _ocr_pool
+
+#stop the shared ocr pool
+def shutdown_ocr_pool():
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is not None:
+            _ocr_pool.shutdown(wait=True)
+            _ocr_pool = None
+
+#get the ocr result cache, None when disabled
+def get_ocr_cache(config: Dict) -> Optional[ResultCache]:
+    global _ocr_cache
+    if not config.get('ocr_cache'):
+        return None
+    
+    with _ocr_cache_lock:
+        if _ocr_cache is None:
+            cache_path = os.path.join(config['data_dir'], 'ocr_cache.sqlite')
+            _ocr_cache = ResultCache(cache_path, max_bytes=config['ocr_cache_max_mb'] * 1024 * 1024)
+        return _ocr_cache
+
+#ocr settings that change the text tesseract returns for the same pixels
+#the backend is the one that actually runs, so text read after a fallback isn't filed under the configured one
+def ocr_settings(config: Dict) -> Dict:
+    return {
+        'threshold': config['image_enhance_threshold'],
+        'language': config.get('ocr_language', 'eng'),
+        'backend': get_ocr_backend(config).name,
+        'roi': [config['roi_header_lines'], config['roi_footer_lines'],
+                config['roi_header_psm'], config['roi_footer_psm'],
+                config['required_fields']] if config.get('ocr_roi') else None,
+        'adaptive': [config['adaptive_methods'], config['adaptive_min_confidence'],
+                     config['required_fields']] if config.get('adaptive_threshold') else None
+    }
+
+#content address for a cropped card: hash of its pixels plus the ocr settings
+def ocr_cache_key(card_image: np.ndarray, settings: Dict) -> str:
+    digest = hashlib.sha256()
+    digest.update(json.dumps(settings, sort_keys=True).encode('utf-8'))
+    digest.update(f"{card_image.shape}{card_image.dtype}".encode('utf-8'))
+    digest.update(np.ascontiguousarray(card_image).data)
+    return digest.hexdigest()
+
+#every field parse_card_metadata can set
+PARSED_FIELDS = ('player_name', 'first_name', 'last_name', 'team', 'position', 'height', 'weight_lbs',
+                 'bats', 'throws', 'birth_date_raw', 'hometown', 'year', 'manufacturer', 'card_code')
+
+#precompiled parser patterns
+#lines without any of these keys (stats table, flavor text) are skipped after one scan
+_LINE_KEYS = re.compile(r'ht:|height:|wt:|weight:|bats:|throws:|born:|home:', re.I)
+_HEIGHT_KEY = re.compile(r'ht:|height:', re.I)
+_HEIGHT = re.compile(r'(\d\'\d+\")')
+_WEIGHT = re.compile(r'Wt:\s*(\d+)', re.I)
+_BATS = re.compile(r'Bats:\s*(Left|Right|Both|Switch)', re.I)
+_THROWS = re.compile(r'Throws:\s*(Left|Right)', re.I)
+_BORN = re.compile(r'Born:\s*([\d-]+\s*,\d{4})', re.I)
+_HOME = re.compile(r'Home:\s*(.+)', re.I)
+
+#copyright year and card code in one scan of the text, the two can't overlap so the first of each
+#is the same match a separate search would find
+_FOOTER = re.compile(r'(?P<copyright>©\s*(?P<year>\d{4})\s*THE TOPPS)|CODE[#:]?\s*(?P<card_code>[A-Z0-9-]+)', re.I)
+
 #parse metadata from raw ocr text
+#single pass over the lines with precompiled patterns, then one scan for the copyright/code footer
 def parse_card_metadata(raw_text: str, card_position: int, sheet_metadata: Dict) -> Dict:
-    lines = [line.strip() for line in raw_text.split('\n') if line.strip()]
+    lines = [line for line in (line.strip() for line in raw_text.split('\n')) if line]
     
     card = sheet_metadata.copy()
     card['card_position'] = f'card {card_position + 1}'
@@ -78,62 +478,149 @@ def parse_card_metadata(raw_text: str, card_position: int, sheet_metadata: Dict)
                 card['team'] = parts[0].strip().title()
                 card['position'] = parts[2].strip().title()
     
-    #extract various stats from remaining lines
+    #extract various stats from remaining lines, later lines win like before
     for line in lines:
-        if re.search(r'ht:|height:', line, re.I):
-            ht_match = re.search(r'(\d\'\d+\")', line)
+        #every key has a colon, the substring check is much cheaper than the regex
+        if ':' not in line or not _LINE_KEYS.search(line):
+            continue
+        
+        if _HEIGHT_KEY.search(line):
+            ht_match = _HEIGHT.search(line)
             if ht_match:
                 card['height'] = ht_match.group(1)
         
-        if re.search(r'wt:|weight:', line, re.I):
-            wt_match = re.search(r'Wt:\s*(\d+)', line, re.I)
-            if wt_match:
-                card['weight_lbs'] = int(wt_match.group(1))
+        wt_match = _WEIGHT.search(line)
+        if wt_match:
+            card['weight_lbs'] = int(wt_match.group(1))
         
-        if re.search(r'Bats:', line, re.I):
-            bats_match = re.search(r'Bats:\s*(Left|Right|Both|Switch)', line, re.I)
-            if bats_match:
-                card['bats'] = bats_match.group(1).title()
+        bats_match = _BATS.search(line)
+        if bats_match:
+            card['bats'] = bats_match.group(1).title()
         
-        if re.search(r'Throws:', line, re.I):
-            throws_match = re.search(r'Throws:\s*(Left|Right)', line, re.I)
-            if throws_match:
-                card['throws'] = throws_match.group(1).title()
+        throws_match = _THROWS.search(line)
+        if throws_match:
+            card['throws'] = throws_match.group(1).title()
         
-        if re.search(r'Born:', line, re.I):
-            born_match = re.search(r'Born:\s*([\d-]+\s*,\d{4})', line, re.I)
-            if born_match:
-                card['birth_date_raw'] = born_match.group(1)
+        born_match = _BORN.search(line)
+        if born_match:
+            card['birth_date_raw'] = born_match.group(1)
         
-        if re.search(r'Home:', line, re.I):
-            home_match = re.search(r'Home:\s*(.+)', line, re.I)
-            if home_match:
-                card['hometown'] = home_match.group(1).strip().title()
-    
-    #year and manufacturer from copyright
-    copyright_match = re.search(r'©\s*(\d{4})\s*THE TOPPS', raw_text, re.IGNORECASE)
-    if copyright_match:
-        card['year'] = copyright_match.group(1)
+        home_match = _HOME.search(line)
+        if home_match:
+            card['hometown'] = home_match.group(1).strip().title()
+    
+    #year and manufacturer from copyright, card code
+    year = None
+    card_code = None
+    for match in _FOOTER.finditer(raw_text):
+        if match.group('copyright'):
+            if year is None:
+                year = match.group('year')
+        elif card_code is None:
+            card_code = match.group('card_code').strip()
+        
+        if year is not None and card_code is not None:
+            break
+    
+    if year is not None:
+        card['year'] = year
         card['manufacturer'] = 'Topps'
     
-    #card code
-    code_match = re.search(r'CODE[#:]?\s*([A-Z0-9-]+)', raw_text, re.IGNORECASE)
-    if code_match:
-        card['card_code'] = code_match.group(1).strip()
+    if card_code is not None:
+        card['card_code'] = card_code
     
     return card
 
+#fraction of ink (white after invert+threshold) pixels in the middle of a binarized cell
+#the outer margin is ignored so sleeve edges and grid lines don't count as ink
+def cell_ink_ratio(cell: np.ndarray, margin: float = 0.05) -> float:
+    height, width = cell.shape[:2]
+    dy = int(height * margin)
+    dx = int(width * margin)
+    inner = cell[dy:height - dy, dx:width - dx]
+    if inner.size == 0:
+        return 0.0
+    return cv2.countNonZero(inner) / inner.size
+
+#empty pocket check: almost no ink, or ink nearly everywhere (dark binder backing)
+def is_blank_cell(ink_ratio: float, config: Dict) -> bool:
+    return ink_ratio < config.get('blank_min_ink', 0.0) or ink_ratio > config.get('blank_max_ink', 1.0)
+
+#record for an empty grid cell, never sent to ocr, enrichment or the llm
+def empty_slot_record(card_position: int, sheet_metadata: Dict, ink_ratio: float) -> Dict:
+    card = sheet_metadata.copy()
+    card['card_position'] = f'card {card_position + 1}'
+    card['empty_slot'] = True
+    card['ink_ratio'] = round(ink_ratio, 4)
+    return card
+
 #main agent 1 pipeline
-def process_card_scan(image_path: str, sheet_metadata: Dict, config: Dict) -> List[Dict]:
+#done_texts: raw text already read for some card indexes (resumed run), on_text(i, raw_text) fires as each
+#remaining card's text comes back from the pool
+def process_card_scan(image_path: str, sheet_metadata: Dict, config: Dict,
+                      done_texts: Optional[Dict[int, str]] = None, on_text=None) -> List[Dict]:
     print(f"\nagent 1: processing scan {image_path}")
     
-    #split grid
-    cropped_cards = load_and_split_scan(image_path, config['card_grid_size'])
+    #binarize the sheet once and split into cell views
+    #multi-page tiffs are processed one page per sheet (sheet_metadata['page_index']), never just the first page
+    if 'page_index' not in sheet_metadata:
+        num_pages = count_scan_pages(image_path)
+        if num_pages > 1:
+            raise ValueError(f"{image_path} has {num_pages} pages, run it through process_batch (one sheet per page) "
+                             f"or set sheet_metadata['page_index']")
+    gray_sheet = load_gray_page(image_path, sheet_metadata.get('page_index', 0))
+    enhanced_sheet = cv2.LUT(gray_sheet, build_threshold_lut(config['image_enhance_threshold']))
+    cropped_cards = split_grid(enhanced_sheet, config['card_grid_size'])
+    print(f"split {len(cropped_cards)} cards from scan")
+    
+    #adaptive mode re-binarizes per card, so workers get the grayscale cells instead
+    if config.get('adaptive_threshold'):
+        ocr_inputs = split_grid(gray_sheet, config['card_grid_size'])
+        ocr_fn = ocr_gray_card_adaptive
+    else:
+        ocr_inputs = cropped_cards
+        ocr_fn = ocr_enhanced_card
     
-    #extract text and parse metadata
+    #skip empty pockets before any ocr work
+    ink_ratios = [cell_ink_ratio(card) for card in cropped_cards]
+    filled = [i for i, ratio in enumerate(ink_ratios) if not is_blank_cell(ratio, config)]
+    raw_texts = [None] * len(cropped_cards)
+    for i, raw_text in (done_texts or {}).items():
+        if i in filled:
+            raw_texts[i] = raw_text
+    
+    #reuse cached text for cards whose pixels and ocr settings haven't changed
+    cache = get_ocr_cache(config)
+    cache_keys = {}
+    if cache:
+        settings = ocr_settings(config)
+        for i in filled:
+            if raw_texts[i] is None:
+                cache_keys[i] = ocr_cache_key(ocr_inputs[i], settings)
+                raw_texts[i] = cache.get(cache_keys[i])
+    
+    #extract text for the rest on the shared pool, map keeps results in card order
+    misses = [i for i in filled if raw_texts[i] is None]
+    pool = get_ocr_pool(config)
+    ocr_texts = pool.map(ocr_fn, [ocr_inputs[i] for i in misses], repeat(config))
+    for i, raw_text in zip(misses, ocr_texts):
+        raw_texts[i] = raw_text
+        if cache:
+            cache.set(cache_keys[i], raw_text)
+        if on_text:
+            on_text(i, raw_text)
+    
+    if cache:
+        print(f"  ocr cache: {len(filled) - len(misses)} hits, {len(misses)} misses")
+    
+    #parse metadata
     cards_data = []
-    for i, card_rgb in enumerate(cropped_cards):
-        raw_text = extract_text_from_card(card_rgb, config['image_enhance_threshold'])
+    for i, raw_text in enumerate(raw_texts):
+        if raw_text is None:
+            cards_data.append(empty_slot_record(i, sheet_metadata, ink_ratios[i]))
+            print(f"  card {i+1}: empty slot")
+            continue
+        
         card_metadata = parse_card_metadata(raw_text, i, sheet_metadata)
         cards_data.append(card_metadata)
         print(f"  card {i+1}: {card_metadata.get('player_name', 'unknown')}")
@@ -141,7 +628,7 @@ def process_card_scan(image_path: str, sheet_metadata: Dict, config: Dict) -> Li
     return cards_data
 
 #save extracted data to json
+#written to a temp file and renamed, so a crash never leaves a truncated stage output behind
 def save_cards_data(cards_data: List[Dict], output_path: str):
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(cards_data, f, indent=4, ensure_ascii=False)
+    write_json_atomic(output_path, cards_data)
     print(f"saved {len(cards_data)} cards to {output_path}")
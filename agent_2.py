@@ -1,8 +1,221 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
+import numpy as np
+import asyncio
+import csv
+import json
+import os
+import random
+import sqlite3
+import unicodedata
+import threading
 import time
 import re
-from typing import Dict, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from cache import ResultCache
+
+#lxml parses several times faster than html.parser when installed
+try:
+    import lxml
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+#only the subtrees the scrapers read are built, the rest of each page is skipped
+#a strainer's class_ string must equal the whole class attribute, so match the class token instead
+#(the real pages use e.g. class="s-item__info clearfix")
+EBAY_ITEMS = SoupStrainer('div', class_=re.compile(r'(^|\s)s-item__info(\s|$)'))
+BBREF_SEARCH_ITEMS = SoupStrainer('div', class_=re.compile(r'(^|\s)search-item(\s|$)'))
+BBREF_FOOTER = SoupStrainer('tfoot')
+
+#one token bucket per host, shared by every thread and sheet in the process
+_host_limiters = {}
+_host_limiters_lock = threading.Lock()
+
+#pooled keep-alive session shared by all lookups
+_http_session = None
+_http_session_lock = threading.Lock()
+
+#per-host request counters and timings
+_http_stats = {}
+_http_stats_lock = threading.Lock()
+
+#bytes downloaded by the lookup running on this thread, the cost stored with cached results,
+#and whether it failed (so a failure isn't cached as "nothing found")
+_lookup_local = threading.local()
+
+#persistent price/stats lookup cache
+_enrich_cache = None
+_enrich_cache_lock = threading.Lock()
+
+#persistent player name -> baseball-reference id index
+_player_index = None
+_player_index_lock = threading.Lock()
+
+#local career stats dataset, loaded once (False when the dataset is missing)
+_stats_provider = None
+_stats_provider_lock = threading.Lock()
+
+#transient statuses worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+#thread-safe token bucket, acquire() blocks until the host's rate allows another request
+#callers reserve a slot under the lock and sleep outside it, so waiting threads are served in order
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        
+        if wait > 0:
+            time.sleep(wait)
+
+#requests per second allowed for a host, 0 means unlimited
+def host_rate(host: str, config: Dict) -> float:
+    if host == urlparse(config.get('ebay_base_url', '')).netloc or host.endswith('ebay.com'):
+        return config.get('ebay_requests_per_sec', 0.5)
+    if host == urlparse(config.get('bbref_base_url', '')).netloc or host.endswith('baseball-reference.com'):
+        return config.get('bbref_requests_per_sec', 0.5)
+    delay = config.get('scrape_delay', 0)
+    return 1 / delay if delay > 0 else 0
+
+#get the shared rate limiter for a host
+def get_rate_limiter(host: str, config: Dict) -> TokenBucket:
+    with _host_limiters_lock:
+        if host not in _host_limiters:
+            _host_limiters[host] = TokenBucket(host_rate(host, config))
+        return _host_limiters[host]
+
+#shared session, connections to each host are kept alive and reused across cards and sheets
+def get_http_session(config: Dict) -> requests.Session:
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            pool_size = max(1, config.get('enrich_concurrency', 8)) * 2
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            _http_session = requests.Session()
+            _http_session.mount('http://', adapter)
+            _http_session.mount('https://', adapter)
+        return _http_session
+
+#add one request's outcome to the host counters
+def _record_request(host: str, seconds: float, response: Optional[requests.Response], retried: bool):
+    with _http_stats_lock:
+        stats = _http_stats.setdefault(host, {'requests': 0, 'retries': 0, 'errors': 0, 'bytes': 0, 'seconds': 0.0})
+        stats['requests'] += 1
+        stats['seconds'] += seconds
+        if retried:
+            stats['retries'] += 1
+        if response is None or response.status_code >= 400:
+            stats['errors'] += 1
+        else:
+            stats['bytes'] += len(response.content)
+    
+    if response is not None:
+        _lookup_local.bytes = getattr(_lookup_local, 'bytes', 0) + len(response.content)
+
+#per-host counters: requests, retries, errors, bytes and average seconds per request
+def http_stats() -> Dict:
+    with _http_stats_lock:
+        report = {}
+        for host, stats in _http_stats.items():
+            report[host] = dict(stats)
+            report[host]['avg_seconds'] = round(stats['seconds'] / stats['requests'], 3) if stats['requests'] else 0
+            report[host]['seconds'] = round(stats['seconds'], 3)
+        return report
+
+#print the per-host counters
+def print_http_stats():
+    for host, stats in http_stats().items():
+        print(f"  {host}: {stats['requests']} requests, {stats['retries']} retries, "
+              f"{stats['errors']} errors, avg {stats['avg_seconds']}s")
+
+#how long to wait before retrying: the server's Retry-After if it sent one, else jittered exponential backoff
+def retry_delay(response: Optional[requests.Response], attempt: int, config: Dict) -> float:
+    max_delay = config.get('http_backoff_max', 30.0)
+    
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after:
+        try:
+            return min(max_delay, max(0.0, float(retry_after)))
+        except ValueError:
+            try:
+                when = parsedate_to_datetime(retry_after)
+                return min(max_delay, max(0.0, (when - datetime.now(timezone.utc)).total_seconds()))
+            except (TypeError, ValueError):
+                pass
+    
+    backoff = config.get('http_backoff_base', 1.0) * (2 ** attempt)
+    return min(max_delay, backoff * random.uniform(0.5, 1.5))
+
+#get a url once its host's token bucket allows it, retrying transient failures (429/5xx, connection errors)
+#the last response is returned even if it's still an error so callers can check the status as before
+def rate_limited_get(url: str, headers: Dict, config: Dict, timeout: int = 10) -> requests.Response:
+    host = urlparse(url).netloc
+    limiter = get_rate_limiter(host, config)
+    session = get_http_session(config)
+    max_retries = config.get('http_max_retries', 3)
+    
+    for attempt in range(max_retries + 1):
+        limiter.acquire()
+        response = None
+        error = None
+        start = time.perf_counter()
+        try:
+            response = session.get(url, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        _record_request(host, time.perf_counter() - start, response, attempt > 0)
+        
+        if response is not None and response.status_code not in RETRY_STATUSES:
+            return response
+        if attempt == max_retries:
+            break
+        
+        time.sleep(retry_delay(response, attempt, config))
+    
+    if response is not None:
+        return response
+    raise error
+
+#sold prices from the top 10 listings of an ebay results page
+def parse_ebay_prices(html: bytes, parser: str = HTML_PARSER) -> List[float]:
+    soup = BeautifulSoup(html, parser, parse_only=EBAY_ITEMS)
+    
+    #find sold price listings
+    prices = []
+    items = soup.find_all('div', class_='s-item__info')
+    
+    for item in items[:10]:  #look at top 10 results
+        price_elem = item.find('span', class_='s-item__price')
+        if price_elem:
+            price_text = price_elem.text.strip()
+            #extract numeric value
+            price_match = re.search(r'\$?([\d,]+\.?\d*)', price_text)
+            if price_match:
+                price_val = float(price_match.group(1).replace(',', ''))
+                prices.append(price_val)
+    
+    return prices
 
 #search ebay sold listings for card value
 #uses ebay advanced search to find completed sales
@@ -13,32 +226,17 @@ def search_ebay_price(player_name: str, year: str, manufacturer: str, config: Di
         query_encoded = query.replace(' ', '+')
         
         #ebay sold listings url
-        url = f"https://www.ebay.com/sch/i.html?_nkw={query_encoded}&LH_Complete=1&LH_Sold=1"
+        url = f"{config.get('ebay_base_url', 'https://www.ebay.com')}/sch/i.html?_nkw={query_encoded}&LH_Complete=1&LH_Sold=1"
         
         headers = {'User-Agent': config['user_agent']}
         
-        time.sleep(config['scrape_delay'])
-        response = requests.get(url, headers=headers, timeout=10)
+        response = rate_limited_get(url, headers, config)
         
         if response.status_code != 200:
             print(f"  ebay request failed: {response.status_code}")
-            return None
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
+            return lookup_failed()
         
-        #find sold price listings
-        prices = []
-        items = soup.find_all('div', class_='s-item__info')
-        
-        for item in items[:10]:  #look at top 10 results
-            price_elem = item.find('span', class_='s-item__price')
-            if price_elem:
-                price_text = price_elem.text.strip()
-                #extract numeric value
-                price_match = re.search(r'\$?([\d,]+\.?\d*)', price_text)
-                if price_match:
-                    price_val = float(price_match.group(1).replace(',', ''))
-                    prices.append(price_val)
+        prices = parse_ebay_prices(response.content)
         
         if not prices:
             return None
@@ -53,97 +251,418 @@ def search_ebay_price(player_name: str, year: str, manufacturer: str, config: Di
             'min_sold_price': round(min_price, 2),
             'max_sold_price': round(max_price, 2),
             'num_sales_found': len(prices),
-            'source': 'ebay_sold_listings'
+            'source': 'ebay_sold_listings',
+            'retrieved_at': datetime.now().isoformat()
         }
     
     except Exception as e:
         print(f"  ebay scrape error: {e}")
-        return None
+        return lookup_failed()
 
-#search baseball reference for player stats
-def search_baseball_reference(player_name: str) -> Optional[Dict]:
-    try:
-        #search url
-        query = player_name.replace(' ', '+')
-        search_url = f"https://www.baseball-reference.com/search/search.fcgi?search={query}"
+#name/team text for index keys: lowercase letters and digits, accents dropped, single spaces
+def normalize_name(text: str) -> str:
+    text = unicodedata.normalize('NFKD', str(text or ''))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(re.sub(r'[^a-z0-9 ]', '', text.lower()).split())
+
+#persistent index of player name (+ team and years where known) -> baseball-reference player id
+#filled from a csv of player ids and from every search agent 2 runs, so repeat lookups skip the search page
+class PlayerIndex:
+    def __init__(self, path: str):
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
         
-        headers = {'User-Agent': 'Mozilla/5.0'}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS players (
+            name TEXT NOT NULL,
+            player_id TEXT NOT NULL,
+            team TEXT NOT NULL DEFAULT '',
+            first_year INTEGER,
+            last_year INTEGER,
+            source TEXT NOT NULL,
+            PRIMARY KEY (name, player_id, team)
+        )''')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)')
+        self._conn.commit()
+    
+    #player id for a name, narrowed by team and year when the name is shared
+    #None when unknown or still ambiguous, the caller then falls back to searching
+    def find(self, player_name: str, team: str = '', year: str = '') -> Optional[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT player_id, team, first_year, last_year FROM players WHERE name = ?',
+                (normalize_name(player_name),)
+            ).fetchall()
         
-        response = requests.get(search_url, headers=headers, timeout=10)
+        candidates = {row[0] for row in rows}
+        if len(candidates) <= 1:
+            return next(iter(candidates), None)
         
-        if response.status_code != 200:
-            return None
+        team = normalize_name(team)
+        year = int(year) if str(year).isdigit() else None
+        matching = set()
+        for player_id, row_team, first_year, last_year in rows:
+            if team and row_team and team not in row_team and row_team not in team:
+                continue
+            if year and first_year and last_year and not first_year <= year <= last_year:
+                continue
+            matching.add(player_id)
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        return next(iter(matching)) if len(matching) == 1 else None
+    
+    def add(self, player_name: str, player_id: str, team: str = '', first_year: Optional[int] = None,
+            last_year: Optional[int] = None, source: str = 'search'):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO players (name, player_id, team, first_year, last_year, source) VALUES (?, ?, ?, ?, ?, ?)',
+                (normalize_name(player_name), player_id, normalize_name(team), first_year, last_year, source)
+            )
+            self._conn.commit()
+    
+    #bulk load player ids from a csv
+    #lahman People.csv columns (nameFirst, nameLast, bbrefID, debut, finalGame) or name, player_id, team, first_year, last_year
+    def load_csv(self, csv_path: str) -> int:
+        def year_of(value):
+            value = (value or '').strip()
+            return int(value[:4]) if value[:4].isdigit() else None
         
-        #try to find player link in search results
-        search_item = soup.find('div', class_='search-item')
-        if not search_item:
-            return None
+        rows = []
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            for record in csv.DictReader(f):
+                player_id = (record.get('bbrefID') or record.get('player_id') or '').strip()
+                name = record.get('name') or f"{record.get('nameFirst', '')} {record.get('nameLast', '')}"
+                if not player_id or not name.strip():
+                    continue
+                
+                rows.append((
+                    normalize_name(name), player_id, normalize_name(record.get('team', '')),
+                    year_of(record.get('first_year') or record.get('debut')),
+                    year_of(record.get('last_year') or record.get('finalGame')),
+                    'csv'
+                ))
         
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO players (name, player_id, team, first_year, last_year, source) VALUES (?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            self._conn.execute('INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)',
+                               (f'csv:{os.path.abspath(csv_path)}', str(os.path.getmtime(csv_path))))
+            self._conn.commit()
+        
+        print(f"player index: loaded {len(rows)} player ids from {csv_path}")
+        return len(rows)
+    
+    #load a csv only if it changed since the last import
+    def load_csv_if_changed(self, csv_path: str) -> int:
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE name = ?',
+                                     (f'csv:{os.path.abspath(csv_path)}',)).fetchone()
+        if row and row[0] == str(os.path.getmtime(csv_path)):
+            return 0
+        return self.load_csv(csv_path)
+
+#get the player identity index, None when disabled
+def get_player_index(config: Dict) -> Optional[PlayerIndex]:
+    global _player_index
+    if not config.get('player_index'):
+        return None
+    
+    with _player_index_lock:
+        if _player_index is None:
+            _player_index = PlayerIndex(os.path.join(config['data_dir'], 'player_index.sqlite'))
+            csv_path = config.get('player_ids_csv')
+            if csv_path and os.path.exists(csv_path):
+                _player_index.load_csv_if_changed(csv_path)
+        return _player_index
+
+#baseball-reference player page url for an id
+def bbref_player_url(player_id: str, config: Dict) -> str:
+    bbref_base_url = config.get('bbref_base_url', 'https://www.baseball-reference.com')
+    return f"{bbref_base_url}/players/{player_id[0]}/{player_id}.shtml"
+
+#player link of every baseball-reference search result, None for a result without one
+def parse_bbref_candidates(html: bytes, parser: str = HTML_PARSER) -> List[Optional[str]]:
+    soup = BeautifulSoup(html, parser, parse_only=BBREF_SEARCH_ITEMS)
+    
+    candidates = []
+    for search_item in soup.find_all('div', class_='search-item'):
         link = search_item.find('a')
-        if not link or 'href' not in link.attrs:
-            return None
+        candidates.append(link['href'] if link and 'href' in link.attrs else None)
+    return candidates
+
+#player link from the first baseball-reference search result
+def parse_bbref_search(html: bytes, parser: str = HTML_PARSER) -> Optional[str]:
+    candidates = parse_bbref_candidates(html, parser)
+    return candidates[0] if candidates else None
+
+#career batting average, home runs and rbi from the footer of a baseball-reference player page
+def parse_bbref_career(html: bytes, parser: str = HTML_PARSER) -> Dict:
+    soup = BeautifulSoup(html, parser, parse_only=BBREF_FOOTER)
+    stats = {}
+    
+    #try to get career stats
+    stats_table = soup.find('tfoot')
+    if stats_table:
+        #batting average
+        avg_elem = stats_table.find('td', {'data-stat': 'batting_avg'})
+        if avg_elem:
+            stats['career_batting_avg'] = avg_elem.text.strip()
+        
+        #home runs
+        hr_elem = stats_table.find('td', {'data-stat': 'HR'})
+        if hr_elem:
+            stats['career_home_runs'] = hr_elem.text.strip()
         
-        player_url = f"https://www.baseball-reference.com{link['href']}"
+        #rbi
+        rbi_elem = stats_table.find('td', {'data-stat': 'RBI'})
+        if rbi_elem:
+            stats['career_rbi'] = rbi_elem.text.strip()
+    
+    return stats
+
+#search baseball reference for player stats
+#known players go straight to their page through the identity index, others are searched and then indexed
+def search_baseball_reference(player_name: str, config: Optional[Dict] = None,
+                              team: str = '', year: str = '') -> Optional[Dict]:
+    config = config or {}
+    try:
+        bbref_base_url = config.get('bbref_base_url', 'https://www.baseball-reference.com')
+        headers = {'User-Agent': 'Mozilla/5.0'}
         
-        #get player page
-        time.sleep(2)
-        player_response = requests.get(player_url, headers=headers, timeout=10)
-        player_soup = BeautifulSoup(player_response.content, 'html.parser')
+        index = get_player_index(config)
+        player_id = index.find(player_name, team, year) if index else None
+        
+        if player_id:
+            player_url = bbref_player_url(player_id, config)
+        else:
+            #search url
+            query = player_name.replace(' ', '+')
+            search_url = f"{bbref_base_url}/search/search.fcgi?search={query}"
+            
+            response = rate_limited_get(search_url, headers, config)
+            
+            if response.status_code != 200:
+                return lookup_failed()
+            
+            #several results can't be told apart without the csv's team and years, don't guess the first one
+            candidates = parse_bbref_candidates(response.content)
+            if len(candidates) > 1:
+                print(f"  baseball reference: {len(candidates)} players named {player_name}, "
+                      f"add them to PLAYER_IDS_CSV to resolve by team and year")
+                return None
+            href = candidates[0] if candidates else None
+            if not href:
+                return None
+            
+            player_url = f"{bbref_base_url}{href}"
+        
+        #get player page (same host, so the bucket spaces it from the search)
+        player_response = rate_limited_get(player_url, headers, config)
+        if player_response.status_code != 200:
+            return lookup_failed()
+        
+        #remember a searched mapping for next time, once its page has been read
+        if not player_id:
+            id_match = re.match(r'/players/\w/(\w+)\.shtml', href)
+            if index and id_match:
+                year_num = int(year) if str(year).isdigit() else None
+                index.add(player_name, id_match.group(1), team, year_num, year_num)
         
         #extract basic stats
         stats = {
             'bbref_url': player_url,
             'source': 'baseball_reference'
         }
-        
-        #try to get career stats
-        stats_table = player_soup.find('tfoot')
-        if stats_table:
-            #batting average
-            avg_elem = stats_table.find('td', {'data-stat': 'batting_avg'})
-            if avg_elem:
-                stats['career_batting_avg'] = avg_elem.text.strip()
-            
-            #home runs
-            hr_elem = stats_table.find('td', {'data-stat': 'HR'})
-            if hr_elem:
-                stats['career_home_runs'] = hr_elem.text.strip()
-            
-            #rbi
-            rbi_elem = stats_table.find('td', {'data-stat': 'RBI'})
-            if rbi_elem:
-                stats['career_rbi'] = rbi_elem.text.strip()
+        stats.update(parse_bbref_career(player_response.content))
         
         return stats
     
     except Exception as e:
         print(f"  baseball reference error: {e}")
+        return lookup_failed()
+
+#get the price/stats lookup cache, None when disabled
+def get_enrich_cache(config: Dict) -> Optional[ResultCache]:
+    global _enrich_cache
+    if not config.get('enrich_cache'):
         return None
+    
+    with _enrich_cache_lock:
+        if _enrich_cache is None:
+            cache_path = os.path.join(config['data_dir'], 'enrich_cache.sqlite')
+            _enrich_cache = ResultCache(cache_path, max_bytes=config['enrich_cache_max_mb'] * 1024 * 1024)
+        return _enrich_cache
 
-#main agent 2 pipeline
-def enrich_card_data(card: Dict, config: Dict) -> Dict:
-    player_name = card.get('player_name', '')
-    year = card.get('year', '')
-    manufacturer = card.get('manufacturer', '')
+#cache key text: lowercase, single spaces
+def normalize_query(*parts: str) -> str:
+    return ' '.join(' '.join(str(p) for p in parts).lower().split())
+
+#returned instead of None by lookups asked to report failures, so callers can tell "nothing found" from "couldn't look"
+LOOKUP_FAILED = object()
+
+#a lookup that errored (bad status, exception) instead of finding nothing, returns its None result
+def lookup_failed() -> None:
+    _lookup_local.failed = True
+    return None
+
+#run a lookup through the cache
+#results are kept for ttl_days; "nothing found" (no sales, no player page) is kept too, as a marker with its
+#own shorter miss_cache_ttl_days. failed lookups aren't stored, with report_failure they return LOOKUP_FAILED
+#refresh skips the cached value but still stores the new one
+def cached_lookup(config: Dict, key: str, ttl_days: float, lookup, refresh: bool = False,
+                  report_failure: bool = False) -> Optional[Dict]:
+    cache = get_enrich_cache(config)
+    if cache and not refresh:
+        cached = cache.get(key, max_age=ttl_days * 86400)
+        if cached is not None:
+            result = json.loads(cached)
+            if 'not_found_at' not in result:
+                return result
+            miss_ttl = min(ttl_days, config.get('miss_cache_ttl_days', 1))
+            if time.time() - result['not_found_at'] <= miss_ttl * 86400:
+                return None
     
-    if not player_name:
-        print(f"  skipping enrichment for card with no player name")
-        return card
+    _lookup_local.bytes = 0
+    _lookup_local.failed = False
+    result = lookup()
+    if _lookup_local.failed:
+        return LOOKUP_FAILED if report_failure else result
+    if cache:
+        value = result if result is not None else {'not_found_at': time.time()}
+        cache.set(key, json.dumps(value), cost=_lookup_local.bytes)
+    return result
+
+#ebay price lookup behind the cache, prices go stale in days
+def lookup_price(player_name: str, year: str, manufacturer: str, config: Dict, refresh: bool = False,
+                 report_failure: bool = False) -> Optional[Dict]:
+    key = 'price:' + normalize_query(year, manufacturer, player_name)
+    return cached_lookup(config, key, config.get('price_cache_ttl_days', 3),
+                         lambda: search_ebay_price(player_name, year, manufacturer, config), refresh, report_failure)
+
+#stats key for a player: the bbref id when the identity index knows it, else the name
+#a name the index can't resolve is searched, and the search only answers for a single result, so team and
+#year wouldn't change what the key resolves to
+def stats_query(player_name: str, config: Dict, team: str = '', year: str = '') -> str:
+    index = get_player_index(config)
+    player_id = index.find(player_name, team, year) if index else None
+    return f"id {player_id}" if player_id else normalize_query(player_name)
+
+#bbref-style batting average text: .255, 1.000
+def format_batting_avg(hits: int, at_bats: int) -> str:
+    if not at_bats:
+        return ''
+    avg = f"{hits / at_bats:.3f}"
+    return avg[1:] if avg.startswith('0') else avg
+
+#career batting totals from a local lahman-style dataset (Batting.csv + People.csv)
+#season rows are summed once at load into numpy columns indexed by player, so a lookup is a couple of dict
+#hits and array reads instead of a rate-limited page scrape
+class LocalStatsProvider:
+    def __init__(self, lahman_dir: str):
+        import pandas as pd
+        
+        batting = pd.read_csv(os.path.join(lahman_dir, 'Batting.csv'), usecols=['playerID', 'AB', 'H', 'HR', 'RBI'])
+        totals = batting.fillna(0).groupby('playerID')[['AB', 'H', 'HR', 'RBI']].sum()
+        self._row = {player_id: i for i, player_id in enumerate(totals.index)}
+        self._at_bats = totals['AB'].to_numpy(dtype=np.int64)
+        self._hits = totals['H'].to_numpy(dtype=np.int64)
+        self._home_runs = totals['HR'].to_numpy(dtype=np.int64)
+        self._rbi = totals['RBI'].to_numpy(dtype=np.int64)
+        
+        #normalized name -> [(lahman id, bbref id, debut year, final year)]
+        people = pd.read_csv(os.path.join(lahman_dir, 'People.csv'), dtype=str, keep_default_na=False,
+                             usecols=lambda c: c in {'playerID', 'nameFirst', 'nameLast', 'bbrefID', 'debut', 'finalGame'})
+        self._by_name = {}
+        self._by_bbref = {}
+        for record in people.itertuples(index=False):
+            entry = (record.playerID, record.bbrefID or record.playerID,
+                     int(record.debut[:4]) if record.debut[:4].isdigit() else None,
+                     int(record.finalGame[:4]) if record.finalGame[:4].isdigit() else None)
+            self._by_name.setdefault(normalize_name(f"{record.nameFirst} {record.nameLast}"), []).append(entry)
+            self._by_bbref[entry[1]] = entry
+        
+        print(f"local stats: {len(self._row)} players from {lahman_dir}")
     
-    print(f"  enriching: {player_name} ({year} {manufacturer})")
+    #the one dataset entry for a card's player, using the identity index id when known and the card year
+    #to split shared names. None when missing or still ambiguous
+    def _find(self, player_name: str, year: str, bbref_id: Optional[str]):
+        if bbref_id and bbref_id in self._by_bbref:
+            return self._by_bbref[bbref_id]
+        
+        candidates = self._by_name.get(normalize_name(player_name), [])
+        if len(candidates) > 1 and str(year).isdigit():
+            year_num = int(year)
+            candidates = [c for c in candidates if c[2] and c[3] and c[2] <= year_num <= c[3]]
+        return candidates[0] if len(candidates) == 1 else None
     
-    #search ebay for pricing
-    price_data = search_ebay_price(player_name, year, manufacturer, config)
+    #career totals in the same shape search_baseball_reference returns
+    def career_stats(self, player_name: str, config: Dict, year: str = '', bbref_id: Optional[str] = None) -> Optional[Dict]:
+        entry = self._find(player_name, year, bbref_id)
+        if entry is None or entry[0] not in self._row:
+            return None
+        
+        row = self._row[entry[0]]
+        return {
+            'bbref_url': bbref_player_url(entry[1], config),
+            'source': 'local_stats',
+            'career_batting_avg': format_batting_avg(int(self._hits[row]), int(self._at_bats[row])),
+            'career_home_runs': str(int(self._home_runs[row])),
+            'career_rbi': str(int(self._rbi[row]))
+        }
+
+#get the local stats provider, None when stats are scraped only or the dataset is missing
+def get_stats_provider(config: Dict) -> Optional[LocalStatsProvider]:
+    global _stats_provider
+    if config.get('stats_provider', 'scrape') == 'scrape':
+        return None
+    
+    with _stats_provider_lock:
+        if _stats_provider is None:
+            lahman_dir = config.get('lahman_dir', '')
+            if os.path.exists(os.path.join(lahman_dir, 'Batting.csv')):
+                _stats_provider = LocalStatsProvider(lahman_dir)
+            else:
+                print(f"local stats: no Batting.csv in '{lahman_dir}'")
+                _stats_provider = False
+        return _stats_provider or None
+
+#career stats lookup: local dataset first when configured, then the cached scrape
+#stats_provider 'offline' never scrapes (air-gapped nodes)
+def lookup_stats(player_name: str, config: Dict, refresh: bool = False, team: str = '', year: str = '') -> Optional[Dict]:
+    provider = get_stats_provider(config)
+    if provider:
+        index = get_player_index(config)
+        bbref_id = index.find(player_name, team, year) if index else None
+        local = provider.career_stats(player_name, config, year, bbref_id)
+        if local:
+            return local
+    
+    if config.get('stats_provider') == 'offline':
+        return None
+    
+    key = 'stats:' + stats_query(player_name, config, team, year)
+    return cached_lookup(config, key, config.get('stats_cache_ttl_days', 90),
+                         lambda: search_baseball_reference(player_name, config, team, year), refresh)
+
+#print cache hit rate for this process
+def print_enrich_cache_stats(config: Dict):
+    cache = get_enrich_cache(config)
+    if cache:
+        stats = cache.stats()
+        print(f"  enrich cache: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['bytes_saved'] / 1024:.0f} kb saved overall")
+
+#attach price/stats lookups to a card
+def apply_enrichment(card: Dict, price_data: Optional[Dict], stats_data: Optional[Dict]) -> Dict:
     if price_data:
         card['market_value'] = price_data
         print(f"    avg price: ${price_data['avg_sold_price']}")
     else:
         print(f"    no price data found")
     
-    #search baseball reference for stats
-    stats_data = search_baseball_reference(player_name)
     if stats_data:
         card['player_stats'] = stats_data
         ba = stats_data.get('career_batting_avg', 'n/a')
@@ -153,13 +672,206 @@ def enrich_card_data(card: Dict, config: Dict) -> Dict:
     
     return card
 
+#replace a card's market value with a fresh lookup and append it to the card's price history
+#the value being replaced seeds the history so trends start from the first price the pipeline saw
+def record_price(card: Dict, price_data: Dict, fallback_timestamp: str = '') -> Dict:
+    history = card.setdefault('price_history', [])
+    old = card.get('market_value')
+    if not history and old:
+        history.append(price_history_entry(old, fallback_timestamp))
+    
+    card['market_value'] = price_data
+    history.append(price_history_entry(price_data, fallback_timestamp))
+    return card
+
+#record a price search that found no sales: the old market_value stays, the attempt goes into price_history and
+#price_checked_at, so the card isn't the stalest one again on the next revalue
+def record_price_miss(card: Dict, checked_at: str, fallback_timestamp: str = '') -> Dict:
+    history = card.setdefault('price_history', [])
+    old = card.get('market_value')
+    if not history and old:
+        history.append(price_history_entry(old, fallback_timestamp))
+    
+    card['price_checked_at'] = checked_at
+    history.append(price_history_entry({'retrieved_at': checked_at, 'num_sales_found': 0}))
+    return card
+
+def price_history_entry(price_data: Dict, fallback_timestamp: str = '') -> Dict:
+    return {
+        'retrieved_at': price_data.get('retrieved_at', fallback_timestamp),
+        'avg_sold_price': price_data.get('avg_sold_price'),
+        'min_sold_price': price_data.get('min_sold_price'),
+        'max_sold_price': price_data.get('max_sold_price'),
+        'num_sales_found': price_data.get('num_sales_found')
+    }
+
+#cards that have something to look up
+def needs_enrichment(card: Dict) -> bool:
+    if card.get('empty_slot'):
+        return False
+    if not card.get('player_name', ''):
+        print(f"  skipping enrichment for card with no player name")
+        return False
+    return True
+
+#main agent 2 pipeline
+def enrich_card_data(card: Dict, config: Dict) -> Dict:
+    if not needs_enrichment(card):
+        return card
+    
+    player_name = card.get('player_name', '')
+    year = card.get('year', '')
+    manufacturer = card.get('manufacturer', '')
+    print(f"  enriching: {player_name} ({year} {manufacturer})")
+    
+    #search ebay for pricing
+    price_data = lookup_price(player_name, year, manufacturer, config)
+    
+    #search baseball reference for stats
+    stats_data = lookup_stats(player_name, config, team=card.get('team', ''), year=year)
+    
+    return apply_enrichment(card, price_data, stats_data)
+
+#resolves each distinct lookup key once per batch
+#a caller asking for a key that is already in flight waits on the same future, later callers get the stored result
+class LookupCoalescer:
+    #http requests one uncached lookup costs: ebay search, bbref search + player page
+    REQUESTS_PER_LOOKUP = {'price': 1, 'stats': 2}
+    
+    def __init__(self):
+        self._futures = {}
+        self._lock = threading.Lock()
+        self.requested = {'price': 0, 'stats': 0}
+        self.resolved = {'price': 0, 'stats': 0}
+    
+    #result for key, running lookup only if no one has resolved or is resolving it
+    #count is how many cards wanted this key
+    def resolve(self, key: Tuple[str, str], lookup, count: int = 1):
+        kind = key[0]
+        with self._lock:
+            self.requested[kind] += count
+            future = self._futures.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._futures[key] = future
+                self.resolved[kind] += 1
+        
+        if owner:
+            try:
+                future.set_result(lookup())
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+    
+    #lookups (and estimated http requests) avoided so far
+    def saved(self) -> Dict:
+        with self._lock:
+            saved = {kind: self.requested[kind] - self.resolved[kind] for kind in self.requested}
+        saved['http_requests'] = sum(saved[kind] * self.REQUESTS_PER_LOOKUP[kind] for kind in self.REQUESTS_PER_LOOKUP)
+        return saved
+    
+    def print_summary(self):
+        saved = self.saved()
+        print(f"enrichment dedupe: saved {saved['price']} price and {saved['stats']} stats lookups "
+              f"(~{saved['http_requests']} http requests)")
+
+#coalescing keys for a card's price and stats lookups
+def lookup_keys(card: Dict, config: Dict) -> Tuple[Tuple[str, str], Tuple[str, str]]:
+    player_name = card.get('player_name', '')
+    price_key = ('price', normalize_query(card.get('year', ''), card.get('manufacturer', ''), player_name))
+    stats_key = ('stats', stats_query(player_name, config, card.get('team', ''), card.get('year', '')))
+    return price_key, stats_key
+
+#resolve distinct lookups concurrently, the per-host token buckets set the pace instead of fixed sleeps
+#price and stats lookups run side by side since they hit different hosts
+async def resolve_lookups_async(jobs: Dict, coalescer: LookupCoalescer, config: Dict, on_result=None) -> Dict:
+    concurrency = max(1, config.get('enrich_concurrency', 8))
+    
+    #lookups block in worker threads while they wait on a bucket or an in-flight key, size the pool so they can all wait
+    #the pool lives for this call only and is shut down with it
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    with ThreadPoolExecutor(max_workers=concurrency * 2, thread_name_prefix='enrich') as executor:
+        async def resolve(key, lookup, count):
+            async with semaphore:
+                result = await loop.run_in_executor(executor, coalescer.resolve, key, lookup, count)
+            if on_result:
+                on_result(key, result)
+            return key, result
+        
+        results = await asyncio.gather(*(resolve(key, lookup, count) for key, (lookup, count) in jobs.items()))
+    return dict(results)
+
+#resolve every job once, concurrently unless async enrichment is off
+#on_result(key, result) fires as each lookup finishes
+def resolve_lookups(jobs: Dict, coalescer: LookupCoalescer, config: Dict, on_result=None) -> Dict:
+    if config.get('async_enrichment'):
+        return asyncio.run(resolve_lookups_async(jobs, coalescer, config, on_result))
+    
+    results = {}
+    for key, (lookup, count) in jobs.items():
+        results[key] = coalescer.resolve(key, lookup, count)
+        if on_result:
+            on_result(key, results[key])
+    return results
+
 #batch enrich all cards
-def enrich_all_cards(cards_data: list, config: Dict) -> list:
+#distinct (player, year, manufacturer) price keys and player stats keys are collected first and each is
+#resolved once, then fanned back out to every card. pass one coalescer for a whole batch to dedupe across sheets
+#a card is finished as soon as both its lookups are, on_card(card) fires right then (resume checkpoints)
+def enrich_all_cards(cards_data: list, config: Dict, coalescer: Optional[LookupCoalescer] = None,
+                     on_card=None) -> list:
     print(f"\nagent 2: enriching {len(cards_data)} cards")
+    coalescer = coalescer or LookupCoalescer()
+    
+    to_enrich = [card for card in cards_data if needs_enrichment(card)]
+    
+    #key -> (lookup, number of cards that need it), the first card's spelling is the one queried
+    #keys are computed once, a search can teach the identity index a player id mid-run
+    card_keys = [lookup_keys(card, config) for card in to_enrich]
+    jobs = {}
+    for card, (price_key, stats_key) in zip(to_enrich, card_keys):
+        player_name = card.get('player_name', '')
+        year = card.get('year', '')
+        manufacturer = card.get('manufacturer', '')
+        
+        for key, lookup in ((price_key, partial(lookup_price, player_name, year, manufacturer, config)),
+                            (stats_key, partial(lookup_stats, player_name, config,
+                                                team=card.get('team', ''), year=year))):
+            if key in jobs:
+                jobs[key] = (jobs[key][0], jobs[key][1] + 1)
+            else:
+                jobs[key] = (lookup, 1)
+    
+    print(f"  {len(to_enrich)} cards need {len(jobs)} distinct lookups")
+    
+    #key -> indexes of the cards waiting on it, and how many lookups each card still waits on
+    waiting = {}
+    for i, keys in enumerate(card_keys):
+        for key in keys:
+            waiting.setdefault(key, []).append(i)
+    remaining = [len(keys) for keys in card_keys]
+    results = {}
+    
+    def finish_cards(key, result):
+        results[key] = result
+        for i in waiting[key]:
+            remaining[i] -= 1
+            if remaining[i]:
+                continue
+            card = to_enrich[i]
+            price_key, stats_key = card_keys[i]
+            print(f"  enriched: {card.get('player_name')} ({card.get('year', '')} {card.get('manufacturer', '')})")
+            apply_enrichment(card, results[price_key], results[stats_key])
+            if on_card:
+                on_card(card)
     
-    enriched_cards = []
-    for i, card in enumerate(cards_data):
-        enriched = enrich_card_data(card, config)
-        enriched_cards.append(enriched)
+    start = time.perf_counter()
+    resolve_lookups(jobs, coalescer, config, finish_cards)
     
-    return enriched_cards
+    print(f"  enriched {len(to_enrich)} cards in {time.perf_counter() - start:.1f}s")
+    print_http_stats()
+    print_enrich_cache_stats(config)
+    return cards_data
@@ -1,19 +1,68 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
 import json
+import os
+import random
+import re
+import threading
+import time
+from cache import ResultCache
 
 #try openai first, fallback to google
 _llm_client = None
 _llm_type = None
+_llm_model = None
+_llm_settings = None
+_llm_lock = threading.Lock()
 
+#caps llm requests in flight across every grading thread in the process, sized by llm_concurrency
+_llm_slots = None
+_llm_slots_size = None
+_llm_slots_lock = threading.Lock()
+
+#persistent description cache keyed on model + prompt hash
+_description_cache = None
+_description_cache_lock = threading.Lock()
+
+#error types and statuses that mean slow down and try again
+RETRY_ERRORS = ('RateLimitError', 'APIConnectionError', 'APITimeoutError', 'InternalServerError',
+                'ResourceExhausted', 'TooManyRequests', 'ServiceUnavailable', 'DeadlineExceeded')
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+#config that picks the llm client, init_llm only rebuilds it when one of these changes
+LLM_CONFIG_KEYS = ('openai_api_key', 'openai_base_url', 'openai_model',
+                   'google_api_key', 'google_api_endpoint', 'google_model')
+
+#models that reject json mode (response_format / response_mime_type), batches to these rely on the prompt alone
+NO_JSON_MODE_MODELS = {
+    'openai': ('gpt-4', 'gpt-4-0314', 'gpt-4-0613', 'gpt-4-32k', 'gpt-3.5-turbo-0301', 'gpt-3.5-turbo-0613'),
+    'google': ('gemini-pro', 'gemini-1.0')
+}
+
+#base urls / endpoints point the clients at a compatible local server (see benchmarks/fake_llm.py)
+#client-side retries are off, call_with_backoff handles rate limits for both providers
+#the client is built once and shared by every grading thread, calling again with the same settings is a no-op
 def init_llm(config: Dict):
-    global _llm_client, _llm_type
+    global _llm_settings
+    settings = tuple(config.get(k) for k in LLM_CONFIG_KEYS)
+    with _llm_lock:
+        if settings != _llm_settings:
+            _init_llm_client(config)
+            _llm_settings = settings
+
+def _init_llm_client(config: Dict):
+    global _llm_client, _llm_type, _llm_model
+    _llm_client, _llm_type, _llm_model = None, None, None
     
     #try openai
     if config.get('openai_api_key'):
         try:
             from openai import OpenAI
-            _llm_client = OpenAI(api_key=config['openai_api_key'])
+            _llm_client = OpenAI(api_key=config['openai_api_key'], base_url=config.get('openai_base_url') or None,
+                                 max_retries=0)
             _llm_type = 'openai'
+            _llm_model = config.get('openai_model', 'gpt-3.5-turbo')
             print("initialized openai llm")
             return
         except Exception as e:
@@ -23,8 +72,13 @@ def init_llm(config: Dict):
     if config.get('google_api_key'):
         try:
             import google.generativeai as genai
-            genai.configure(api_key=config['google_api_key'])
-            _llm_client = genai.GenerativeModel('gemini-pro')
+            if config.get('google_api_endpoint'):
+                genai.configure(api_key=config['google_api_key'], transport='rest',
+                                client_options={'api_endpoint': config['google_api_endpoint']})
+            else:
+                genai.configure(api_key=config['google_api_key'])
+            _llm_model = config.get('google_model', 'gemini-pro')
+            _llm_client = genai.GenerativeModel(_llm_model)
             _llm_type = 'google'
             print("initialized google gemini llm")
             return
@@ -33,11 +87,8 @@ def init_llm(config: Dict):
     
     print("warning: no llm available for agent 3")
 
-#generate card description using llm
-def generate_card_description(card: Dict) -> Optional[str]:
-    if not _llm_client:
-        return None
-    
+#card details block shared by the single and multi-card prompts
+def card_prompt_details(card: Dict) -> str:
     player = card.get('player_name', 'unknown')
     year = card.get('year', 'unknown')
     manufacturer = card.get('manufacturer', 'unknown')
@@ -60,34 +111,235 @@ def generate_card_description(card: Dict) -> Optional[str]:
         if avg_price > 0:
             value_text = f"Recent sold average: ${avg_price}. "
     
-    prompt = f"""Write a concise 2-3 sentence description for this baseball card:
-
-Player: {player}
+    return f"""Player: {player}
 Year: {year}
 Manufacturer: {manufacturer}
 Team: {team}
 Position: {position}
-{stats_text}{value_text}
+{stats_text}{value_text}"""
+
+#prompt for one card
+def build_description_prompt(card: Dict) -> str:
+    return f"""Write a concise 2-3 sentence description for this baseball card:
+
+{card_prompt_details(card)}
 
 Make it informative and appealing for a card collector. Focus on the player's significance and card value."""
+
+#prompt for several cards answered as one json object
+def build_batch_prompt(cards: List[Dict]) -> str:
+    blocks = '\n\n'.join(f"Card {i + 1}:\n{card_prompt_details(card)}" for i, card in enumerate(cards))
+    return f"""Write a concise 2-3 sentence description for each of these baseball cards:
+
+{blocks}
+
+Make each one informative and appealing for a card collector. Focus on the player's significance and card value.
+Respond with JSON only: {{"descriptions": [{{"card": 1, "description": "..."}}, ...]}}"""
+
+#whether the initialized model accepts json mode, older ones error on it
+def json_mode_supported() -> bool:
+    model = (_llm_model or '').split('/')[-1]
+    unsupported = NO_JSON_MODE_MODELS.get(_llm_type, ())
+    if _llm_type == 'google':
+        return not model.startswith(unsupported)
+    return model not in unsupported
+
+#send one prompt to whichever llm was initialized
+#json_mode is dropped on models without it, the prompt still asks for json
+def complete_prompt(prompt: str, max_tokens: int = 150, json_mode: bool = False) -> str:
+    json_mode = json_mode and json_mode_supported()
+    if _llm_type == 'openai':
+        kwargs = {'response_format': {'type': 'json_object'}} if json_mode else {}
+        response = _llm_client.chat.completions.create(
+            model=_llm_model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            **kwargs
+        )
+        return response.choices[0].message.content.strip()
+    
+    elif _llm_type == 'google':
+        kwargs = {'generation_config': {'response_mime_type': 'application/json'}} if json_mode else {}
+        response = _llm_client.generate_content(prompt, **kwargs)
+        return response.text.strip()
+    
+    raise RuntimeError('no llm initialized')
+
+#rate limited / transient error from either client
+def is_retryable(error: Exception) -> bool:
+    if type(error).__name__ in RETRY_ERRORS:
+        return True
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    return status in RETRY_STATUSES
+
+#seconds to wait before retrying: the server's retry-after if it sent one, else jittered exponential backoff
+def llm_retry_delay(error: Exception, attempt: int, config: Dict) -> float:
+    max_delay = config.get('llm_backoff_max', 30.0)
+    response = getattr(error, 'response', None)
+    retry_after = response.headers.get('retry-after') if response is not None and hasattr(response, 'headers') else None
+    if retry_after:
+        try:
+            return min(max_delay, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+    
+    backoff = config.get('llm_backoff_base', 1.0) * (2 ** attempt)
+    return min(max_delay, backoff * random.uniform(0.5, 1.5))
+
+#process-wide request limiter, rebuilt only when llm_concurrency changes
+def get_llm_slots(config: Dict) -> threading.BoundedSemaphore:
+    global _llm_slots, _llm_slots_size
+    size = max(1, config.get('llm_concurrency', 4))
+    with _llm_slots_lock:
+        if _llm_slots is None or _llm_slots_size != size:
+            _llm_slots, _llm_slots_size = threading.BoundedSemaphore(size), size
+        return _llm_slots
+
+#run an llm call, retrying rate limits and transient errors up to llm_max_retries times
+#each attempt holds one of the process's llm_concurrency slots, backoff sleeps don't
+def call_with_backoff(call, config: Dict):
+    max_retries = config.get('llm_max_retries', 5)
+    slots = get_llm_slots(config)
+    for attempt in range(max_retries + 1):
+        try:
+            with slots:
+                return call()
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            time.sleep(llm_retry_delay(e, attempt, config))
+
+#generate card description using llm
+def generate_card_description(card: Dict, config: Optional[Dict] = None) -> Optional[str]:
+    if not _llm_client:
+        return None
+    
+    prompt = build_description_prompt(card)
     
     try:
-        if _llm_type == 'openai':
-            response = _llm_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=150
-            )
-            return response.choices[0].message.content.strip()
-        
-        elif _llm_type == 'google':
-            response = _llm_client.generate_content(prompt)
-            return response.text.strip()
+        return call_with_backoff(lambda: complete_prompt(prompt), config or {})
     
     except Exception as e:
         print(f"  llm description error: {e}")
         return None
 
+#descriptions for several cards from one request, keyed by index in cards
+#cards the model skipped or mangled are missing from the result
+def generate_batch_descriptions(cards: List[Dict], config: Dict) -> Dict[int, str]:
+    prompt = build_batch_prompt(cards)
+    
+    try:
+        text = call_with_backoff(lambda: complete_prompt(prompt, 150 * len(cards), json_mode=True), config)
+        #some models wrap json in a code fence or a sentence, without json mode especially
+        text = re.sub(r'^```(?:json)?\s*|\s*```$', '', text)
+        text = text[text.find('{'):text.rfind('}') + 1] or text
+        items = json.loads(text).get('descriptions', [])
+    except Exception as e:
+        print(f"  llm batch description error: {e}")
+        return {}
+    
+    descriptions = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.get('card')) - 1
+        except (TypeError, ValueError):
+            continue
+        description = str(item.get('description') or '').strip()
+        if 0 <= index < len(cards) and description:
+            descriptions[index] = description
+    return descriptions
+
+#descriptions for a chunk of cards: one multi-card request, then single-card requests for anything it missed
+#each comes back with the prompt mode that wrote it, 'batch' or 'single'
+def describe_chunk(cards: List[Dict], config: Dict) -> List[Tuple[Optional[str], str]]:
+    if len(cards) == 1:
+        return [(generate_card_description(cards[0], config), 'single')]
+    
+    descriptions = generate_batch_descriptions(cards, config)
+    return [(descriptions[i], 'batch') if i in descriptions else (generate_card_description(card, config), 'single')
+            for i, card in enumerate(cards)]
+
+#get the description cache, None when disabled
+def get_description_cache(config: Dict) -> Optional[ResultCache]:
+    global _description_cache
+    if not config.get('description_cache'):
+        return None
+    
+    with _description_cache_lock:
+        if _description_cache is None:
+            cache_path = os.path.join(config['data_dir'], 'description_cache.sqlite')
+            _description_cache = ResultCache(cache_path, max_bytes=config['description_cache_max_mb'] * 1024 * 1024)
+        return _description_cache
+
+#cache key for a card's description: the model, the prompt mode that wrote it and a hash of the exact
+#single-card prompt. any change to the fields that feed the prompt (stats, price, ...) is a new key
+#batch descriptions are written from a different prompt, so they're kept apart from single-card ones
+def description_cache_key(card: Dict, mode: str) -> str:
+    prompt_hash = hashlib.sha256(build_description_prompt(card).encode('utf-8')).hexdigest()
+    return f"{_llm_type}:{_llm_model}:{mode}:{prompt_hash}"
+
+#generate descriptions on up to llm_concurrency threads, call_with_backoff keeps the whole process to that many requests in flight
+#llm_batch_size > 1 packs that many cards into each request (json mode)
+#on_result(i, description, mode) fires as each request comes back
+def generate_descriptions(cards: List[Dict], config: Dict, on_result=None) -> List[Optional[str]]:
+    batch_size = max(1, config.get('llm_batch_size', 1))
+    starts = range(0, len(cards), batch_size)
+    workers = max(1, min(config.get('llm_concurrency', 4), len(starts)))
+    descriptions = [None] * len(cards)
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='llm') as pool:
+        futures = {pool.submit(describe_chunk, cards[i:i + batch_size], config): i for i in starts}
+        for future in as_completed(futures):
+            first = futures[future]
+            for offset, (description, mode) in enumerate(future.result()):
+                descriptions[first + offset] = description
+                if on_result:
+                    on_result(first + offset, description, mode)
+    
+    return descriptions
+
+#descriptions for every card, cached ones skip the llm entirely
+#batched runs also reuse single-card descriptions, the batch's own fallback would write the same thing
+#on_result(i, description) fires for each card as soon as its description is known
+def describe_cards(cards: List[Dict], config: Dict, on_result=None) -> List[Optional[str]]:
+    if not _llm_client or not cards:
+        return [None] * len(cards)
+    
+    cache = get_description_cache(config)
+    descriptions = [None] * len(cards)
+    misses = list(range(len(cards)))
+    
+    if cache:
+        ttl_days = config.get('description_cache_ttl_days', 0)
+        modes = ('batch', 'single') if config.get('llm_batch_size', 1) > 1 else ('single',)
+        misses = []
+        for i, card in enumerate(cards):
+            for mode in modes:
+                descriptions[i] = cache.get(description_cache_key(card, mode),
+                                            max_age=ttl_days * 86400 if ttl_days else None)
+                if descriptions[i] is not None:
+                    break
+            if descriptions[i] is None:
+                misses.append(i)
+            elif on_result:
+                on_result(i, descriptions[i])
+    
+    def generated_one(j, description, mode):
+        i = misses[j]
+        descriptions[i] = description
+        if cache and description:
+            cache.set(description_cache_key(cards[i], mode), description, cost=len(description.encode('utf-8')))
+        if on_result:
+            on_result(i, description)
+    
+    generated = generate_descriptions([cards[i] for i in misses], config, generated_one) if misses else []
+    
+    print(f"  descriptions: {len(cards) - len(misses)} cached, {sum(1 for d in generated if d)} generated"
+          + (f", {sum(1 for d in generated if not d)} failed" if not all(generated) else ''))
+    return descriptions
+
 #estimate card condition/grade from ocr quality and completeness
 def estimate_card_grade(card: Dict) -> Dict:
     raw_text = card.get('raw_text', '')
@@ -145,8 +397,8 @@ def estimate_card_grade(card: Dict) -> Dict:
         'note': 'estimate based on ocr quality, not physical inspection'
     }
 
-#main agent 3 pipeline
-def grade_and_describe_card(card: Dict) -> Dict:
+#grade estimate for one card
+def grade_card(card: Dict) -> Dict:
     player_name = card.get('player_name', 'unknown')
     
     print(f"  grading: {player_name}")
@@ -155,25 +407,51 @@ def grade_and_describe_card(card: Dict) -> Dict:
     grade_info = estimate_card_grade(card)
     card['condition_estimate'] = grade_info
     print(f"    grade: {grade_info['estimated_grade']} ({grade_info['grade_numeric']}/10)")
+    return card
+
+def apply_description(card: Dict, description: Optional[str]) -> Dict:
+    if description:
+        card['ai_description'] = description
+        print(f"    description ({card.get('player_name', 'unknown')}): {description[:60]}...")
+    return card
+
+#main agent 3 pipeline
+def grade_and_describe_card(card: Dict, config: Optional[Dict] = None) -> Dict:
+    if card.get('empty_slot'):
+        return card
+    
+    grade_card(card)
     
     #generate description with llm
     if _llm_client:
-        description = generate_card_description(card)
-        if description:
-            card['ai_description'] = description
-            print(f"    description: {description[:60]}...")
+        apply_description(card, generate_card_description(card, config))
     
     return card
 
 #batch process all cards
-def grade_all_cards(cards_data: list, config: Dict) -> list:
+#grades are local heuristics, descriptions go out concurrently (and optionally several cards per request)
+#on_card(card) fires once a card is fully graded and described (resume checkpoints)
+def grade_all_cards(cards_data: list, config: Dict, on_card=None) -> list:
     print(f"\nagent 3: grading and describing {len(cards_data)} cards")
     
     init_llm(config)
     
-    graded_cards = []
-    for card in cards_data:
-        graded = grade_and_describe_card(card)
-        graded_cards.append(graded)
+    to_grade = [card for card in cards_data if not card.get('empty_slot')]
+    for card in to_grade:
+        grade_card(card)
+    
+    if _llm_client and to_grade:
+        def described(i, description):
+            apply_description(to_grade[i], description)
+            if on_card and description:
+                on_card(to_grade[i])
+        
+        start = time.perf_counter()
+        descriptions = describe_cards(to_grade, config, described)
+        print(f"  described {sum(1 for d in descriptions if d)}/{len(to_grade)} cards "
+              f"in {time.perf_counter() - start:.1f}s")
+    elif on_card:
+        for card in to_grade:
+            on_card(card)
     
-    return graded_cards
+    return cards_data
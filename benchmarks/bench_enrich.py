@@ -0,0 +1,55 @@
+#enrichment throughput against local stand-in servers, no network needed
+#run from the repo root: python -m benchmarks.bench_enrich --cards 40 --rate 20
+import argparse
+import tempfile
+import time
+from config import load_config
+from agent_2 import enrich_all_cards, http_stats
+from benchmarks.fake_http import serve
+
+def synthetic_cards(count: int) -> list:
+    return [{'card_position': f'card {i + 1}', 'player_name': f'Player {i}',
+             'year': '2012', 'manufacturer': 'Topps'} for i in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmark agent 2 against local stand-in servers')
+    parser.add_argument('--cards', type=int, default=40)
+    parser.add_argument('--rate', type=float, default=20.0, help='requests/sec allowed per host')
+    parser.add_argument('--latency', type=float, default=0.05, help='server response time in seconds')
+    parser.add_argument('--fail-every', type=int, default=0, help='every nth request returns 429')
+    parser.add_argument('--padding-kb', type=int, default=0, help='page size padding')
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+    
+    #separate servers so each stand-in host gets its own rate limiter, like the real sites
+    #scratch data_dir and no player index, so neither run reuses ids the other one learned
+    with serve(args.latency, args.fail_every, args.padding_kb) as (ebay_url, _), \
+         serve(args.latency, args.fail_every, args.padding_kb) as (bbref_url, _), \
+         tempfile.TemporaryDirectory() as data_dir:
+        config = load_config()
+        config.update({
+            'data_dir': data_dir,
+            'ebay_base_url': ebay_url,
+            'bbref_base_url': bbref_url,
+            'ebay_requests_per_sec': args.rate,
+            'bbref_requests_per_sec': args.rate,
+            'http_backoff_base': 0.01,
+            'enrich_concurrency': args.concurrency,
+            'enrich_cache': False,
+            'player_index': False
+        })
+        
+        for mode in (False, True):
+            config['async_enrichment'] = mode
+            start = time.perf_counter()
+            enrich_all_cards(synthetic_cards(args.cards), config)
+            elapsed = time.perf_counter() - start
+            label = 'async' if mode else 'serial'
+            print(f"\n{label}: {args.cards} cards in {elapsed:.2f}s ({args.cards / elapsed:.1f} cards/sec)\n")
+        
+        print("http counters:")
+        for host, stats in http_stats().items():
+            print(f"  {host}: {stats}")
+
+if __name__ == "__main__":
+    main()
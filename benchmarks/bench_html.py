@@ -0,0 +1,146 @@
+#html parsing benchmark for the agent 2 scrapers
+#checks the targeted parsers give the same output as the original full-tree html.parser code, then reports
+#pages/sec and peak memory per parser on saved pages (or synthetic ones sized like the real sites)
+#run from the repo root: python -m benchmarks.bench_html --padding-kb 2048
+#saved pages: python -m benchmarks.bench_html --ebay 'pages/ebay_*.html' --bbref-player 'pages/bbref_*.html'
+import argparse
+import glob
+import re
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+from bs4 import BeautifulSoup
+from agent_2 import parse_ebay_prices, parse_bbref_search, parse_bbref_career
+from benchmarks.fake_http import ebay_search_page, bbref_search_page, bbref_player_page
+
+#original scraper code, full tree with html.parser, kept as the reference implementation
+def legacy_ebay_prices(html: bytes) -> List[float]:
+    soup = BeautifulSoup(html, 'html.parser')
+    prices = []
+    items = soup.find_all('div', class_='s-item__info')
+    for item in items[:10]:
+        price_elem = item.find('span', class_='s-item__price')
+        if price_elem:
+            price_match = re.search(r'\$?([\d,]+\.?\d*)', price_elem.text.strip())
+            if price_match:
+                prices.append(float(price_match.group(1).replace(',', '')))
+    return prices
+
+def legacy_bbref_search(html: bytes):
+    soup = BeautifulSoup(html, 'html.parser')
+    search_item = soup.find('div', class_='search-item')
+    if not search_item:
+        return None
+    link = search_item.find('a')
+    if not link or 'href' not in link.attrs:
+        return None
+    return link['href']
+
+def legacy_bbref_career(html: bytes) -> Dict:
+    soup = BeautifulSoup(html, 'html.parser')
+    stats = {}
+    stats_table = soup.find('tfoot')
+    if stats_table:
+        for stat, key in (('batting_avg', 'career_batting_avg'), ('HR', 'career_home_runs'), ('RBI', 'career_rbi')):
+            elem = stats_table.find('td', {'data-stat': stat})
+            if elem:
+                stats[key] = elem.text.strip()
+    return stats
+
+PAGE_KINDS = {
+    'ebay': (legacy_ebay_prices, parse_ebay_prices),
+    'bbref_search': (legacy_bbref_search, parse_bbref_search),
+    'bbref_player': (legacy_bbref_career, parse_bbref_career)
+}
+
+def available_parsers() -> List[str]:
+    parsers = ['html.parser']
+    try:
+        import lxml
+        parsers.append('lxml')
+    except ImportError:
+        pass
+    return parsers
+
+def load_pages(patterns: List[str]) -> List[bytes]:
+    pages = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            with open(path, 'rb') as f:
+                pages.append(f.read())
+    return pages
+
+#pages/sec over the fixture set, repeated until min_seconds has passed
+def throughput(parse: Callable, pages: List[bytes], min_seconds: float) -> float:
+    parsed = 0
+    start = time.perf_counter()
+    while True:
+        for page in pages:
+            parse(page)
+        parsed += len(pages)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return parsed / elapsed
+
+#peak traced allocation while parsing one page, largest over the set
+def peak_memory(parse: Callable, pages: List[bytes]) -> int:
+    peak = 0
+    for page in pages:
+        tracemalloc.start()
+        parse(page)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return peak
+
+def main():
+    parser = argparse.ArgumentParser(description='agent 2 html parsing equality and throughput check')
+    parser.add_argument('--ebay', nargs='*', default=[], help='saved ebay results pages (globs ok)')
+    parser.add_argument('--bbref-search', nargs='*', default=[], help='saved baseball-reference search pages')
+    parser.add_argument('--bbref-player', nargs='*', default=[], help='saved baseball-reference player pages')
+    parser.add_argument('--padding-kb', type=int, default=2048, help='size of synthetic pages when none are given')
+    parser.add_argument('--seconds', type=float, default=2.0, help='time budget per parser')
+    args = parser.parse_args()
+    
+    fixtures = {
+        'ebay': load_pages(args.ebay),
+        'bbref_search': load_pages(args.bbref_search),
+        'bbref_player': load_pages(args.bbref_player)
+    }
+    if not any(fixtures.values()):
+        print(f"no saved pages given, using synthetic {args.padding_kb} kb pages")
+        fixtures = {
+            'ebay': [ebay_search_page(60, args.padding_kb).encode('utf-8')],
+            'bbref_search': [bbref_search_page('venabwi01', args.padding_kb).encode('utf-8')],
+            'bbref_player': [bbref_player_page(args.padding_kb).encode('utf-8')]
+        }
+    
+    mismatches = 0
+    for kind, pages in fixtures.items():
+        if not pages:
+            continue
+        legacy, current = PAGE_KINDS[kind]
+        size_kb = sum(len(page) for page in pages) / len(pages) / 1024
+        print(f"\n{kind}: {len(pages)} pages, avg {size_kb:,.0f} kb")
+        
+        runs = [('legacy full tree', legacy)]
+        for name in available_parsers():
+            runs.append((f'targeted {name}', lambda page, name=name: current(page, name)))
+        
+        #same output as the original code on every page
+        for label, parse in runs[1:]:
+            bad = sum(1 for page in pages if parse(page) != legacy(page))
+            mismatches += bad
+            print(f"  {label}: {len(pages) - bad}/{len(pages)} identical")
+        
+        baseline = None
+        for label, parse in runs:
+            rate = throughput(parse, pages, args.seconds)
+            peak = peak_memory(parse, pages)
+            baseline = baseline or rate
+            print(f"  {label:<22} {rate:8.2f} pages/sec  {rate / baseline:5.2f}x  peak {peak / 1024 / 1024:7.1f} mb")
+    
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
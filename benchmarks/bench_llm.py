@@ -0,0 +1,51 @@
+#agent 3 description throughput against a local stand-in llm server, no network or api keys needed
+#run from the repo root: python -m benchmarks.bench_llm --cards 40 --latency 0.5 --provider openai
+import argparse
+import time
+from config import load_config
+import agent_3
+from benchmarks.fake_llm import serve
+
+def synthetic_cards(count: int) -> list:
+    return [{'card_position': f'card {i + 1}', 'player_name': f'Player {i}', 'year': '2012',
+             'manufacturer': 'Topps', 'team': 'Pirates', 'position': 'Pitcher'} for i in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmark agent 3 descriptions against a local stand-in llm')
+    parser.add_argument('--cards', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.5, help='server response time in seconds')
+    parser.add_argument('--fail-every', type=int, default=0, help='every nth request returns 429')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=9, help='cards per request in multi-card mode')
+    parser.add_argument('--provider', choices=['openai', 'google'], default='openai')
+    args = parser.parse_args()
+    
+    with serve(args.latency, args.fail_every) as (url, server):
+        config = load_config()
+        if args.provider == 'openai':
+            config.update({'openai_api_key': 'fake', 'openai_base_url': f'{url}/v1'})
+        else:
+            config.update({'openai_api_key': '', 'google_api_key': 'fake', 'google_api_endpoint': url})
+        config.update({'llm_backoff_base': 0.05, 'description_cache': False})
+        agent_3.init_llm(config)
+        
+        runs = [('serial', 1, 1), ('concurrent', args.concurrency, 1), ('batched', args.concurrency, args.batch_size)]
+        baseline = None
+        for label, concurrency, batch_size in runs:
+            cards = synthetic_cards(args.cards)
+            config.update({'llm_concurrency': concurrency, 'llm_batch_size': batch_size})
+            requests_before = server.request_count
+            server.max_in_flight = 0
+            
+            start = time.perf_counter()
+            descriptions = agent_3.describe_cards(cards, config)
+            elapsed = time.perf_counter() - start
+            
+            baseline = baseline or elapsed
+            described = sum(1 for d in descriptions if d)
+            print(f"{label}: {described}/{len(cards)} described in {elapsed:.2f}s "
+                  f"({len(cards) / elapsed:.1f} cards/sec, {baseline / elapsed:.1f}x), "
+                  f"{server.request_count - requests_before} requests, max {server.max_in_flight} in flight")
+
+if __name__ == "__main__":
+    main()
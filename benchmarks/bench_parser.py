@@ -0,0 +1,154 @@
+#regression + throughput harness for parse_card_metadata
+#replays stored raw_text through the legacy (pre single-pass) parser and the current one and checks the
+#outputs are identical, key order included
+#run from the repo root: python -m benchmarks.bench_parser [files...]
+import argparse
+import glob
+import re
+import sys
+import time
+from typing import Dict, List
+from agent_1 import parse_card_metadata
+from storage import load_sheet
+
+DEFAULT_FILES = ['cardscans/sheet_001_metadata.json']
+
+#original parser, kept verbatim as the reference implementation
+def legacy_parse_card_metadata(raw_text: str, card_position: int, sheet_metadata: Dict) -> Dict:
+    lines = [line.strip() for line in raw_text.split('\n') if line.strip()]
+    
+    card = sheet_metadata.copy()
+    card['card_position'] = f'card {card_position + 1}'
+    card['raw_text'] = raw_text
+    
+    #player name (first line)
+    if lines:
+        full_name_line = lines[0].replace('-', ' ').strip()
+        full_name = full_name_line.strip().title()
+        card['player_name'] = full_name
+        
+        #split first and last name
+        name_parts = full_name.split()
+        if len(name_parts) >= 2:
+            card['first_name'] = name_parts[0]
+            card['last_name'] = ' '.join(name_parts[1:])
+        elif len(name_parts) == 1:
+            card['first_name'] = name_parts[0]
+            card['last_name'] = ''
+        else:
+            card['first_name'] = ''
+            card['last_name'] = ''
+    
+    #team and position (second line)
+    if len(lines) >= 2:
+        team_pos_line = lines[1]
+        if '"' in team_pos_line:
+            parts = team_pos_line.split('"')
+            if len(parts) >= 3:
+                card['team'] = parts[0].strip().title()
+                card['position'] = parts[2].strip().title()
+    
+    #extract various stats from remaining lines
+    for line in lines:
+        if re.search(r'ht:|height:', line, re.I):
+            ht_match = re.search(r'(\d\'\d+\")', line)
+            if ht_match:
+                card['height'] = ht_match.group(1)
+        
+        if re.search(r'wt:|weight:', line, re.I):
+            wt_match = re.search(r'Wt:\s*(\d+)', line, re.I)
+            if wt_match:
+                card['weight_lbs'] = int(wt_match.group(1))
+        
+        if re.search(r'Bats:', line, re.I):
+            bats_match = re.search(r'Bats:\s*(Left|Right|Both|Switch)', line, re.I)
+            if bats_match:
+                card['bats'] = bats_match.group(1).title()
+        
+        if re.search(r'Throws:', line, re.I):
+            throws_match = re.search(r'Throws:\s*(Left|Right)', line, re.I)
+            if throws_match:
+                card['throws'] = throws_match.group(1).title()
+        
+        if re.search(r'Born:', line, re.I):
+            born_match = re.search(r'Born:\s*([\d-]+\s*,\d{4})', line, re.I)
+            if born_match:
+                card['birth_date_raw'] = born_match.group(1)
+        
+        if re.search(r'Home:', line, re.I):
+            home_match = re.search(r'Home:\s*(.+)', line, re.I)
+            if home_match:
+                card['hometown'] = home_match.group(1).strip().title()
+    
+    #year and manufacturer from copyright
+    copyright_match = re.search(r'©\s*(\d{4})\s*THE TOPPS', raw_text, re.IGNORECASE)
+    if copyright_match:
+        card['year'] = copyright_match.group(1)
+        card['manufacturer'] = 'Topps'
+    
+    #card code
+    code_match = re.search(r'CODE[#:]?\s*([A-Z0-9-]+)', raw_text, re.IGNORECASE)
+    if code_match:
+        card['card_code'] = code_match.group(1).strip()
+    
+    return card
+
+#stored raw_text values from card lists or pipeline outputs ({'cards': [...]})
+def load_raw_texts(paths: List[str]) -> List[str]:
+    raw_texts = []
+    for path in paths:
+        data = load_sheet(path)
+        cards = data.get('cards', []) if isinstance(data, dict) else data
+        raw_texts.extend(card['raw_text'] for card in cards if card.get('raw_text'))
+    return raw_texts
+
+#cards parsed per second over the whole corpus
+def throughput(parser, raw_texts: List[str], min_seconds: float) -> float:
+    parsed = 0
+    start = time.perf_counter()
+    while True:
+        for i, raw_text in enumerate(raw_texts):
+            parser(raw_text, i, {})
+        parsed += len(raw_texts)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return parsed / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='parse_card_metadata regression and throughput check')
+    parser.add_argument('files', nargs='*', help='sheet outputs with raw_text, any output format (globs ok), default: sheet_001 sample')
+    parser.add_argument('--seconds', type=float, default=2.0, help='time budget per parser')
+    args = parser.parse_args()
+    
+    paths = []
+    for pattern in args.files or DEFAULT_FILES:
+        paths.extend(sorted(glob.glob(pattern)) or [pattern])
+    
+    raw_texts = load_raw_texts(paths)
+    if not raw_texts:
+        print("no raw_text found")
+        return 1
+    print(f"replaying {len(raw_texts)} raw_text values from {len(paths)} files")
+    
+    #field equality, including dict key order so json output is byte-identical
+    mismatches = 0
+    for i, raw_text in enumerate(raw_texts):
+        expected = list(legacy_parse_card_metadata(raw_text, i, {}).items())
+        actual = list(parse_card_metadata(raw_text, i, {}).items())
+        if expected != actual:
+            mismatches += 1
+            print(f"  mismatch on card {i + 1}:")
+            print(f"    legacy:  {expected}")
+            print(f"    current: {actual}")
+    print(f"field equality: {len(raw_texts) - mismatches}/{len(raw_texts)} identical")
+    
+    legacy_rate = throughput(legacy_parse_card_metadata, raw_texts, args.seconds)
+    current_rate = throughput(parse_card_metadata, raw_texts, args.seconds)
+    print(f"legacy parser:  {legacy_rate:,.0f} cards/sec")
+    print(f"current parser: {current_rate:,.0f} cards/sec")
+    print(f"speedup:        {current_rate / legacy_rate:.2f}x")
+    
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#benchmark: whole-sheet numpy/opencv preprocessing vs the per-card pil path
+#run from the repo root: python -m benchmarks.bench_preprocess --dpi 600
+import argparse
+import os
+import tempfile
+import time
+import cv2
+import numpy as np
+from PIL import Image
+from agent_1 import load_and_split_scan, enhance_card, load_and_split_enhanced
+
+#3x3 sheet of card-back-like cells (light stock, dark text strokes) at the given dpi
+def make_synthetic_sheet(dpi: int, grid_size: int = 3) -> np.ndarray:
+    card_w = int(2.5 * dpi)
+    card_h = int(3.5 * dpi)
+    rng = np.random.default_rng(0)
+    
+    sheet = np.full((card_h * grid_size, card_w * grid_size, 3), 215, dtype=np.uint8)
+    sheet += rng.integers(0, 25, sheet.shape, dtype=np.uint8)
+    
+    line_h = max(4, dpi // 20)
+    for y in range(line_h, sheet.shape[0], line_h * 2):
+        mask = rng.random(sheet.shape[1]) < 0.4
+        sheet[y:y + line_h // 2, mask] = 30
+    
+    return sheet
+
+#current path: color decode, bgr->rgb, per-card pil grayscale/invert/point
+def run_pil_path(image_path: str, grid_size: int, threshold: int) -> list:
+    cards = load_and_split_scan(image_path, grid_size)
+    return [np.asarray(enhance_card(Image.fromarray(card), threshold)) for card in cards]
+
+#new path: grayscale decode, one lut pass for the sheet, cell views
+def run_vectorized_path(image_path: str, grid_size: int, threshold: int) -> list:
+    return load_and_split_enhanced(image_path, grid_size, threshold)
+
+def time_it(fn, repeats: int) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmark sheet preprocessing')
+    parser.add_argument('--image', help='existing scan to use instead of a synthetic sheet')
+    parser.add_argument('--dpi', type=int, default=600)
+    parser.add_argument('--grid-size', type=int, default=3)
+    parser.add_argument('--threshold', type=int, default=140)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    
+    image_path = args.image
+    tmp_dir = None
+    if not image_path:
+        tmp_dir = tempfile.TemporaryDirectory()
+        image_path = os.path.join(tmp_dir.name, f'synthetic_{args.dpi}dpi.png')
+        cv2.imwrite(image_path, make_synthetic_sheet(args.dpi, args.grid_size))
+    
+    height, width = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE).shape
+    print(f"scan: {image_path} ({width}x{height}, {width * height / 1e6:.1f} mp)")
+    
+    pil_cells = run_pil_path(image_path, args.grid_size, args.threshold)
+    fast_cells = run_vectorized_path(image_path, args.grid_size, args.threshold)
+    
+    #grayscale rounding differs slightly between pil and opencv, report how much
+    differing = sum(int(np.count_nonzero(a != b)) for a, b in zip(pil_cells, fast_cells))
+    total = sum(a.size for a in pil_cells)
+    print(f"pixels differing from pil path: {differing}/{total} ({100 * differing / total:.4f}%)")
+    
+    pil_time = time_it(lambda: run_pil_path(image_path, args.grid_size, args.threshold), args.repeats)
+    fast_time = time_it(lambda: run_vectorized_path(image_path, args.grid_size, args.threshold), args.repeats)
+    
+    print(f"pil path:        {pil_time * 1000:.1f} ms/sheet")
+    print(f"vectorized path: {fast_time * 1000:.1f} ms/sheet")
+    print(f"speedup:         {pil_time / fast_time:.2f}x")
+    
+    if tmp_dir:
+        tmp_dir.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#collection query latency on a synthetic collection
+#builds a CardCatalog of --cards synthetic cards, checks every query against a linear scan of the records,
+#then reports build time and per-query latency (median / p99) for the catalog and the scan
+#run from the repo root: python -m benchmarks.bench_query --cards 100000
+import argparse
+import random
+import statistics
+import sys
+import time
+from typing import Dict, List
+from query import CardCatalog, index_key
+
+TEAMS = ['Padres', 'Pirates', 'Cubs', 'Mets', 'Yankees', 'Red Sox', 'Dodgers', 'Giants', 'Cardinals', 'Braves',
+         'Phillies', 'Astros', 'Rangers', 'Mariners', 'Angels', 'Athletics', 'Twins', 'Tigers', 'Royals', 'Indians',
+         'White Sox', 'Orioles', 'Rays', 'Blue Jays', 'Marlins', 'Nationals', 'Reds', 'Brewers', 'Rockies', 'Diamondbacks']
+MANUFACTURERS = ['Topps', 'Upper Deck', 'Donruss', 'Fleer', 'Bowman', 'Score']
+
+#cards laid out 9 to a binder page, card values roughly log-normal like real prices
+def synthetic_collection(count: int, players: int = 5000, seed: int = 1) -> List[Dict]:
+    rng = random.Random(seed)
+    names = [f"Player {i}" for i in range(players)]
+    cards = []
+    for i in range(count):
+        cards.append({
+            'sheet_id': f"sheet_{i // 9:06d}",
+            'card_position': f"card {i % 9 + 1}",
+            'player_name': rng.choice(names),
+            'team': rng.choice(TEAMS),
+            'year': str(rng.randint(1980, 2015)),
+            'manufacturer': rng.choice(MANUFACTURERS),
+            'card_code': f"W{rng.randrange(10 ** 8):08d}",
+            'binder_page': f"binder {i // 900 + 1} - page {i // 9 % 100 + 1}",
+            'value': round(rng.lognormvariate(0.5, 1.2), 2)
+        })
+    return cards
+
+#reference answer: filter every record, sort by (sort key, id) the way the catalog's stable orders do
+def linear_query(records: List[Dict], min_value=None, max_value=None, sort='value', descending=True, limit=None,
+                 **filters) -> List[Dict]:
+    wanted = {field: index_key(value) for field, value in filters.items() if value is not None}
+    matches = [r for r in records
+               if all(index_key(r.get(field)) == key for field, key in wanted.items())
+               and (min_value is None or r['value'] >= min_value) and (max_value is None or r['value'] <= max_value)]
+    sort_key = (lambda r: r['value']) if sort == 'value' else (lambda r: index_key(r.get(sort)))
+    matches.sort(key=lambda r: (sort_key(r), r['id']), reverse=descending)
+    return matches[:limit] if limit else matches
+
+#per-call latencies in seconds, repeated until min_seconds has passed
+def latencies(run, min_seconds: float) -> List[float]:
+    times = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        call_start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - call_start)
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description='collection query latency on a synthetic collection')
+    parser.add_argument('--cards', type=int, default=100000)
+    parser.add_argument('--seconds', type=float, default=0.5, help='time budget per query')
+    args = parser.parse_args()
+    
+    cards = synthetic_collection(args.cards)
+    catalog = CardCatalog()
+    start = time.perf_counter()
+    for card in cards:
+        catalog.add(card)
+    catalog.build()
+    print(f"built catalog of {len(catalog):,} cards in {time.perf_counter() - start:.2f}s")
+    
+    sample = cards[len(cards) // 2]
+    queries = [
+        ('padres 2012 over $5', {'team': 'Padres', 'year': '2012', 'min_value': 5}),
+        ('card code', {'card_code': sample['card_code']}),
+        ('binder page', {'binder_page': sample['binder_page'], 'sort': 'card_code', 'descending': False}),
+        ('player by year', {'player_name': sample['player_name'], 'sort': 'year'}),
+        ('topps 1990s team, top 25', {'manufacturer': 'Topps', 'team': sample['team'], 'year': '1995', 'limit': 25}),
+        ('top 20 by value', {'limit': 20}),
+        ('$10-$20, top 50', {'min_value': 10, 'max_value': 20, 'limit': 50}),
+        ('first 20 by player', {'sort': 'player_name', 'descending': False, 'limit': 20})
+    ]
+    
+    mismatches = 0
+    print(f"\n{'query':<28} {'matches':>8} {'catalog p50':>12} {'p99':>10} {'scan p50':>10}")
+    for label, params in queries:
+        expected = linear_query(catalog.records, **params)
+        results = catalog.query(**params)
+        if [r['id'] for r in results] != [r['id'] for r in expected]:
+            mismatches += 1
+            print(f"{label}: results differ from the linear scan")
+            continue
+        
+        indexed = sorted(latencies(lambda: catalog.query(**params), args.seconds))
+        scan = latencies(lambda: linear_query(catalog.records, **params), args.seconds)
+        p99 = indexed[min(len(indexed) - 1, int(len(indexed) * 0.99))]
+        print(f"{label:<28} {len(results):>8} {statistics.median(indexed) * 1e6:>9.1f} us {p99 * 1e6:>7.1f} us "
+              f"{statistics.median(scan) * 1e3:>7.1f} ms")
+    
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#header/footer band ocr (OCR_ROI) vs full-card ocr on real scans
+#every filled card is read both ways with the configured backend, no ocr cache; reports per-field fill rate,
+#how often the roi value matches the full-card one, how often roi fell back to the full card, and time per card
+#roi time includes the full-card pass when it falls back, same as the pipeline
+#run from the repo root: python -m benchmarks.bench_roi cardscans/*.jpg
+import argparse
+import glob
+import time
+import cv2
+from config import load_config
+from agent_1 import (PARSED_FIELDS, build_threshold_lut, cell_ink_ratio, get_ocr_backend, is_blank_cell,
+                     load_gray_page, missing_fields, ocr_card_regions, parse_card_metadata, split_grid)
+
+#binarized cells of a scan's first page, empty pockets left out
+def filled_cards(image_path: str, config: dict) -> list:
+    sheet = cv2.LUT(load_gray_page(image_path), build_threshold_lut(config['image_enhance_threshold']))
+    cells = split_grid(sheet, config['card_grid_size'])
+    return [cell for cell in cells if not is_blank_cell(cell_ink_ratio(cell), config)]
+
+#parsed fields of one card read both ways, plus the seconds each took and whether roi fell back
+def compare_card(card, backend, config: dict) -> dict:
+    start = time.perf_counter()
+    full_text = backend.image_to_string(card)
+    full_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    roi = ocr_card_regions(card, backend, config)
+    roi_seconds = time.perf_counter() - start
+    fell_back = roi is None
+    if fell_back:
+        roi_text, roi_seconds = full_text, roi_seconds + full_seconds
+    else:
+        roi_text = roi[0]
+    
+    return {
+        'full': parse_card_metadata(full_text, 0, {}),
+        'roi': parse_card_metadata(roi_text, 0, {}),
+        'full_seconds': full_seconds,
+        'roi_seconds': roi_seconds,
+        'fell_back': fell_back
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='compare header/footer roi ocr with full-card ocr')
+    parser.add_argument('scans', nargs='+', help='sheet scans (globs ok)')
+    args = parser.parse_args()
+    
+    config = load_config()
+    backend = get_ocr_backend(config)
+    
+    paths = []
+    for pattern in args.scans:
+        paths.extend(sorted(glob.glob(pattern)) or [pattern])
+    
+    results = []
+    for path in paths:
+        cards = filled_cards(path, config)
+        results.extend(compare_card(card, backend, config) for card in cards)
+        print(f"{path}: {len(cards)} cards")
+    if not results:
+        print("no filled cards found")
+        return 1
+    
+    count = len(results)
+    print(f"\n{count} cards, backend {backend.name}, "
+          f"{sum(r['fell_back'] for r in results)} fell back to full-card ocr")
+    print(f"{'field':<16}{'full':>8}{'roi':>8}{'same':>8}")
+    for field in PARSED_FIELDS:
+        full_filled = sum(not missing_fields(r['full'], [field]) for r in results)
+        roi_filled = sum(not missing_fields(r['roi'], [field]) for r in results)
+        same = sum(r['full'].get(field) == r['roi'].get(field) for r in results)
+        print(f"{field:<16}{full_filled / count:>8.0%}{roi_filled / count:>8.0%}{same / count:>8.0%}")
+    
+    full_time = sum(r['full_seconds'] for r in results)
+    roi_time = sum(r['roi_seconds'] for r in results)
+    print(f"\nfull card: {full_time / count * 1000:.0f} ms/card")
+    print(f"roi:       {roi_time / count * 1000:.0f} ms/card ({full_time / roi_time:.2f}x)")
+
+if __name__ == "__main__":
+    main()
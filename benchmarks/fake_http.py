@@ -0,0 +1,101 @@
+#local stand-in for ebay and baseball-reference so enrichment can be tested and benchmarked offline
+#point agent 2 at it with EBAY_BASE_URL / BBREF_BASE_URL (or the matching config keys)
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+#filler markup so pages can be sized like the real multi-megabyte ones
+def padding_html(padding_kb: int) -> str:
+    block = '<div class="s-item__wrapper"><span class="filler">lorem ipsum dolor sit amet</span></div>\n'
+    return block * (padding_kb * 1024 // len(block))
+
+#ebay sold listings page with num_items results
+def ebay_search_page(num_items: int = 10, padding_kb: int = 0) -> str:
+    items = []
+    for i in range(num_items):
+        items.append(
+            '<li class="s-item s-item__pl-on-bottom"><div class="s-item__info clearfix">'
+            f'<a class="s-item__link" href="/itm/{i}"><div class="s-item__title">card listing {i}</div></a>'
+            f'<div class="s-item__details"><span class="s-item__price">${5 + i * 1.25:,.2f}</span></div>'
+            '</div></li>'
+        )
+    return (f'<html><head><title>ebay</title></head><body>{padding_html(padding_kb // 2)}'
+            f'<ul class="srp-results">{"".join(items)}</ul>{padding_html(padding_kb // 2)}</body></html>')
+
+#baseball-reference search results page pointing at one player
+def bbref_search_page(player_id: str = 'venabwi01', padding_kb: int = 0) -> str:
+    return (f'<html><body>{padding_html(padding_kb)}<div id="players">'
+            f'<div class="search-item clearfix"><div class="search-item-name">'
+            f'<a href="/players/{player_id[0]}/{player_id}.shtml">player</a></div></div>'
+            f'</div></body></html>')
+
+#baseball-reference player page with a career totals footer
+def bbref_player_page(padding_kb: int = 0) -> str:
+    rows = ''.join(f'<tr><th data-stat="year_ID">{2008 + i}</th><td data-stat="HR">{i}</td></tr>' for i in range(15))
+    return (f'<html><body>{padding_html(padding_kb)}<table id="batting_standard"><tbody>{rows}</tbody>'
+            '<tfoot><tr><th>162 Game Avg.</th><td data-stat="batting_avg">.250</td>'
+            '<td data-stat="HR">36</td><td data-stat="RBI">143</td></tr></tfoot></table></body></html>')
+
+class FakeScrapeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+            count = server.request_count
+        
+        if server.latency:
+            time.sleep(server.latency)
+        
+        #injected transient failure, tells the client to retry right away
+        if server.fail_every and count % server.fail_every == 0:
+            self._send(429, 'rate limited', {'Retry-After': '0'})
+            return
+        
+        url = urlparse(self.path)
+        if url.path == '/sch/i.html':
+            self._send(200, ebay_search_page(10, server.padding_kb))
+        elif url.path == '/search/search.fcgi':
+            name = parse_qs(url.query).get('search', ['x'])[0]
+            player_id = (''.join(c for c in name.lower() if c.isalpha())[:7] or 'x') + '01'
+            self._send(200, bbref_search_page(player_id, server.padding_kb))
+        elif url.path.startswith('/players/'):
+            self._send(200, bbref_player_page(server.padding_kb))
+        else:
+            self._send(404, 'not found')
+    
+    def _send(self, status: int, body: str, headers: dict = None):
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def log_message(self, format, *args):
+        pass
+
+#run a stand-in server on a free local port for the duration of the block, yields its base url
+#latency: seconds added to every response, fail_every: every nth request gets a 429
+@contextmanager
+def serve(latency: float = 0.0, fail_every: int = 0, padding_kb: int = 0):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeScrapeHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.fail_every = fail_every
+    server.padding_kb = padding_kb
+    server.request_count = 0
+    server.lock = threading.Lock()
+    
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,107 @@
+#local stand-in for the openai chat completions and gemini generateContent apis so agent 3 can be tested offline
+#point agent 3 at it with OPENAI_BASE_URL=<url>/v1 or GOOGLE_API_ENDPOINT=<url> (or the matching config keys)
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+#canned description built from the Player/Year/Manufacturer lines of a card block
+def fake_description(details: str) -> str:
+    fields = dict(re.findall(r'^(Player|Year|Manufacturer|Team): (.*)$', details, re.MULTILINE))
+    return (f"This {fields.get('Year', 'unknown')} {fields.get('Manufacturer', 'unknown')} card features "
+            f"{fields.get('Player', 'unknown')} of the {fields.get('Team', 'unknown')}. "
+            f"A solid pickup for any collector.")
+
+#answer a prompt the way agent 3 expects: plain text for one card, json for a multi-card prompt
+def fake_completion(prompt: str) -> str:
+    blocks = re.split(r'^Card (\d+):$', prompt, flags=re.MULTILINE)
+    if len(blocks) == 1:
+        return fake_description(prompt)
+    
+    descriptions = [{'card': int(number), 'description': fake_description(details)}
+                    for number, details in zip(blocks[1::2], blocks[2::2])]
+    return json.dumps({'descriptions': descriptions})
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        
+        with server.lock:
+            server.request_count += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            count = server.request_count
+        
+        try:
+            if server.latency:
+                time.sleep(server.latency)
+            
+            #injected rate limit, tells the client to retry right away
+            if server.fail_every and count % server.fail_every == 0:
+                self._send(429, {'error': {'message': 'rate limited', 'type': 'rate_limit_error', 'code': 429,
+                                           'status': 'RESOURCE_EXHAUSTED'}}, {'Retry-After': '0'})
+                return
+            
+            path = self.path.split('?')[0]
+            if path.endswith('/chat/completions'):
+                prompt = body['messages'][-1]['content']
+                self._send(200, {
+                    'id': f'chatcmpl-{count}',
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': body.get('model', 'fake'),
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': fake_completion(prompt)}}],
+                    'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+                })
+            elif path.endswith(':generateContent'):
+                prompt = ''.join(part.get('text', '') for part in body['contents'][-1]['parts'])
+                self._send(200, {
+                    'candidates': [{'index': 0, 'finishReason': 'STOP',
+                                    'content': {'role': 'model', 'parts': [{'text': fake_completion(prompt)}]}}]
+                })
+            else:
+                self._send(404, {'error': {'message': 'not found', 'code': 404}})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+    
+    def _send(self, status: int, body: dict, headers: dict = None):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def log_message(self, format, *args):
+        pass
+
+#run a stand-in llm server on a free local port for the duration of the block, yields its base url
+#latency: seconds added to every response, fail_every: every nth request gets a 429
+#server.max_in_flight records the most concurrent requests seen
+@contextmanager
+def serve(latency: float = 0.0, fail_every: int = 0):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeLLMHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.fail_every = fail_every
+    server.request_count = 0
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.lock = threading.Lock()
+    
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", server
+    finally:
+        server.shutdown()
+        server.server_close()
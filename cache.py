@@ -0,0 +1,180 @@
+import argparse
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+#persistent key/value cache backed by sqlite
+#entries are evicted least-recently-used once the cache grows past max_bytes
+#each entry can carry a cost (bytes the original fetch downloaded), hits add it to a lifetime bytes_saved counter
+#reads don't write: access times and counters are kept in memory and flushed with the next set(), every
+#flush_every lookups, or on stats()/close()
+class ResultCache:
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, flush_every: int = 256):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.flush_every = flush_every
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._accessed = {}
+        self._counters = {}
+        self._pending = 0
+        
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created REAL NOT NULL,
+            accessed REAL NOT NULL
+        )''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value REAL NOT NULL)')
+        
+        #caches created before costs were tracked
+        columns = [row[1] for row in self._conn.execute('PRAGMA table_info(entries)')]
+        if 'cost' not in columns:
+            self._conn.execute('ALTER TABLE entries ADD COLUMN cost INTEGER NOT NULL DEFAULT 0')
+        self._conn.commit()
+        
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        self._closed = False
+        
+        #process-wide caches are never closed explicitly, write what's pending on exit
+        atexit.register(self.close)
+    
+    #look up a key, entries older than max_age seconds count as misses
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT value, created, cost FROM entries WHERE key = ?', (key,)).fetchone()
+            value = None
+            if row is None or (max_age is not None and now - row[1] > max_age):
+                self.misses += 1
+                self._bump('misses', 1)
+            else:
+                value = row[0]
+                self._accessed[key] = now
+                self.hits += 1
+                self._bump('hits', 1)
+                self._bump('bytes_saved', row[2])
+            
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._flush()
+                self._conn.commit()
+            return value
+    
+    #add to a lifetime counter, written at the next flush (caller holds the lock)
+    def _bump(self, name: str, amount: float):
+        self._counters[name] = self._counters.get(name, 0) + amount
+    
+    #write pending access times and counters (caller holds the lock and commits)
+    def _flush(self):
+        if self._accessed:
+            self._conn.executemany('UPDATE entries SET accessed = ? WHERE key = ?',
+                                   [(accessed, key) for key, accessed in self._accessed.items()])
+        self._conn.executemany(
+            'INSERT INTO counters (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + ?',
+            [(name, amount, amount) for name, amount in self._counters.items()]
+        )
+        self._accessed = {}
+        self._counters = {}
+        self._pending = 0
+    
+    #store a value, evicting old entries if over the size limit
+    def set(self, key: str, value: str, cost: int = 0):
+        now = time.time()
+        size = len(key) + len(value.encode('utf-8'))
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM entries WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO entries (key, value, size, created, accessed, cost) VALUES (?, ?, ?, ?, ?, ?)',
+                (key, value, size, now, now, cost)
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            self._flush()
+            
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+    
+    #drop least recently used entries until back under 90% of the limit
+    def _evict(self):
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute('SELECT key, size FROM entries ORDER BY accessed').fetchall()
+        
+        evicted = []
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            evicted.append((key,))
+            self._total_bytes -= size
+        
+        self._conn.executemany('DELETE FROM entries WHERE key = ?', evicted)
+    
+    #hit/miss counters for this session, lifetime counters and current size
+    def stats(self) -> Dict:
+        with self._lock:
+            self._flush()
+            self._conn.commit()
+            entries = self._conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+            counters = dict(self._conn.execute('SELECT name, value FROM counters').fetchall())
+        
+        lookups = self.hits + self.misses
+        lifetime_hits = int(counters.get('hits', 0))
+        lifetime_lookups = lifetime_hits + int(counters.get('misses', 0))
+        return {
+            'entries': entries,
+            'bytes': self._total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+            'lifetime_hits': lifetime_hits,
+            'lifetime_misses': lifetime_lookups - lifetime_hits,
+            'lifetime_hit_rate': round(lifetime_hits / lifetime_lookups, 3) if lifetime_lookups else 0,
+            'bytes_saved': int(counters.get('bytes_saved', 0))
+        }
+    
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._flush()
+            self._conn.commit()
+            self._conn.close()
+
+#cache stats from the command line: python cache.py stats data/enrich_cache.sqlite
+def main():
+    parser = argparse.ArgumentParser(description='inspect result caches')
+    parser.add_argument('command', choices=['stats'])
+    parser.add_argument('paths', nargs='+', help='cache files')
+    args = parser.parse_args()
+    
+    for path in args.paths:
+        if not os.path.exists(path):
+            print(f"{path}: not found")
+            continue
+        
+        cache = ResultCache(path)
+        stats = cache.stats()
+        cache.close()
+        
+        print(f"{path}:")
+        print(f"  entries: {stats['entries']} ({stats['bytes'] / 1024:.1f} kb)")
+        print(f"  hits: {stats['lifetime_hits']}, misses: {stats['lifetime_misses']}, "
+              f"hit rate: {stats['lifetime_hit_rate']:.1%}")
+        print(f"  bytes saved: {stats['bytes_saved'] / 1024:.1f} kb")
+
+if __name__ == "__main__":
+    main()
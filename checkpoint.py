@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict
+from storage import sheet_exists, write_json_atomic
+
+#sha256 of a file's bytes, remembered per (path, size, mtime) so multi-page scans are hashed once
+@lru_cache(maxsize=256)
+def _file_digest(path: str, size: int, mtime: float) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def file_fingerprint(path: str) -> str:
+    stat = os.stat(path)
+    return _file_digest(os.path.abspath(path), stat.st_size, stat.st_mtime)
+
+#version of the code behind a stage: hash of the module sources, so any edit invalidates its checkpoints
+def code_version(*modules) -> str:
+    digest = hashlib.sha256()
+    for module in modules:
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+#stable hash of anything json-serializable
+def fingerprint(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+#per-sheet resume state in data_dir
+#{sheet_id}_manifest.json records which stages finished and under which fingerprint
+#{sheet_id}_{stage}.partial.jsonl collects one line per card while a stage runs, so an interrupted stage
+#picks up mid-sheet. a torn last line (crash mid-write) is ignored, lines from another fingerprint too
+class SheetCheckpoint:
+    def __init__(self, data_dir: str, sheet_id: str):
+        self.data_dir = data_dir
+        self.sheet_id = sheet_id
+        self.manifest_path = os.path.join(data_dir, f"{sheet_id}_manifest.json")
+        self._lock = threading.Lock()
+        
+        self.manifest = {'sheet_id': sheet_id, 'stages': {}}
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    self.manifest = json.load(f)
+            except (OSError, ValueError):
+                pass
+    
+    def partial_path(self, stage: str) -> str:
+        return os.path.join(self.data_dir, f"{self.sheet_id}_{stage}.partial.jsonl")
+    
+    #True if the stage finished under this fingerprint and its output is still on disk
+    def is_complete(self, stage: str, stage_fingerprint: str) -> bool:
+        entry = self.manifest['stages'].get(stage)
+        return bool(entry and entry.get('fingerprint') == stage_fingerprint
+                    and sheet_exists(entry.get('output', '')))
+    
+    #record a finished stage and drop its per-card partials
+    def mark_complete(self, stage: str, stage_fingerprint: str, output_path: str, cards: int):
+        with self._lock:
+            self.manifest['stages'][stage] = {
+                'fingerprint': stage_fingerprint,
+                'output': output_path,
+                'cards': cards,
+                'completed_at': datetime.now().isoformat()
+            }
+            write_json_atomic(self.manifest_path, self.manifest)
+        
+        if os.path.exists(self.partial_path(stage)):
+            os.remove(self.partial_path(stage))
+    
+    #per-card results saved by an earlier, interrupted run of this stage: card index -> value
+    def load_partial(self, stage: str, stage_fingerprint: str) -> Dict[int, object]:
+        done = {}
+        path = self.partial_path(stage)
+        if not os.path.exists(path):
+            return done
+        
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get('fingerprint') == stage_fingerprint:
+                    done[record['index']] = record['value']
+        return done
+    
+    #save one card's result, a single appended line flushed to disk
+    def append(self, stage: str, stage_fingerprint: str, index: int, value):
+        line = json.dumps({'fingerprint': stage_fingerprint, 'index': index, 'value': value}, ensure_ascii=False)
+        with self._lock:
+            with open(self.partial_path(stage), 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+                f.flush()
+                os.fsync(f.fileno())
@@ -0,0 +1,170 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+from storage import load_sheet, sheet_mtime
+
+_collection_index = None
+_collection_index_lock = threading.Lock()
+
+#card fields with their own columns, missing ones get the defaults the collection summary reports
+CARD_FIELDS = ('card_position', 'player_name', 'team', 'year', 'manufacturer', 'card_code', 'binder_page')
+FIELD_DEFAULTS = {'player_name': 'unknown', 'team': 'unknown', 'year': 'unknown'}
+
+def card_fields(card: Dict) -> Dict:
+    return {field: card.get(field, FIELD_DEFAULTS.get(field)) for field in CARD_FIELDS}
+
+#estimated value of a card, 0 when it has no price
+def card_value(card: Dict) -> float:
+    return (card.get('market_value') or {}).get('avg_sold_price') or 0
+
+#persistent index of every cataloged card across the final outputs
+#sheets are keyed on their absolute path, so the f-string paths outputs are written to and the globbed ones
+#syncs and summaries pass in name the same sheet
+#the fields queries filter on get their own columns, the whole card (minus raw_text) is kept as json
+#each sheet's final output is upserted as it's written, replacing that sheet's previous rows, so collection
+#summaries are sqlite aggregates instead of a reload of every output file
+class CollectionIndex:
+    def __init__(self, path: str):
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS sheets (
+            path TEXT PRIMARY KEY,
+            sheet_id TEXT,
+            mtime REAL NOT NULL,
+            cards INTEGER NOT NULL,
+            total_value REAL NOT NULL,
+            indexed_at REAL NOT NULL
+        )''')
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS cards (
+            path TEXT NOT NULL,
+            card_index INTEGER NOT NULL,
+            sheet_id TEXT,
+            card_position TEXT,
+            player_name TEXT,
+            team TEXT,
+            year TEXT,
+            manufacturer TEXT,
+            card_code TEXT,
+            binder_page TEXT,
+            value REAL NOT NULL,
+            card TEXT NOT NULL,
+            PRIMARY KEY (path, card_index)
+        )''')
+        for column in ('player_name', 'team', 'year'):
+            self._conn.execute(f'CREATE INDEX IF NOT EXISTS cards_{column} ON cards ({column})')
+        self._conn.commit()
+    
+    #replace a sheet's cards with those of its final output, empty slots are left out
+    def upsert_sheet(self, path: str, final_output: Dict, mtime: Optional[float] = None):
+        path = os.path.abspath(path)
+        sheet_id = final_output.get('sheet_metadata', {}).get('sheet_id')
+        rows = []
+        for i, card in enumerate(final_output.get('cards', [])):
+            if card.get('empty_slot'):
+                continue
+            
+            stored = {k: v for k, v in card.items() if k != 'raw_text'}
+            rows.append((path, i, sheet_id, *card_fields(card).values(), card_value(card),
+                         json.dumps(stored, ensure_ascii=False)))
+        
+        with self._lock:
+            with self._conn:
+                self._conn.execute('DELETE FROM cards WHERE path = ?', (path,))
+                self._conn.executemany('INSERT INTO cards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO sheets (path, sheet_id, mtime, cards, total_value, indexed_at) VALUES (?, ?, ?, ?, ?, ?)',
+                    (path, sheet_id, mtime if mtime is not None else sheet_mtime(path), len(rows),
+                     sum(row[10] for row in rows), time.time())
+                )
+    
+    def remove_sheet(self, path: str):
+        path = os.path.abspath(path)
+        with self._lock:
+            with self._conn:
+                self._conn.execute('DELETE FROM cards WHERE path = ?', (path,))
+                self._conn.execute('DELETE FROM sheets WHERE path = ?', (path,))
+    
+    #bring the index up to date with final outputs on disk, one sheet in memory at a time
+    #outputs written while the index was off, or changed since (a file mtime other than the indexed one) are
+    #re-read; with prune, sheets no longer in paths are dropped
+    def sync(self, paths: List[str], prune: bool = False) -> int:
+        with self._lock:
+            indexed = dict(self._conn.execute('SELECT path, mtime FROM sheets').fetchall())
+        
+        updated = 0
+        for path in map(os.path.abspath, paths):
+            mtime = sheet_mtime(path)
+            if indexed.pop(path, None) != mtime:
+                self.upsert_sheet(path, load_sheet(path, with_raw_text=False), mtime)
+                updated += 1
+        
+        if prune:
+            for path in indexed:
+                self.remove_sheet(path)
+        return updated
+    
+    #indexed fields, value and card json of every card, in sheet order, read in batches
+    def iter_cards(self, batch_size: int = 1000):
+        with self._lock:
+            cursor = self._conn.execute(
+                'SELECT sheet_id, card_position, player_name, team, year, manufacturer, card_code, binder_page, value, card '
+                'FROM cards ORDER BY path, card_index'
+            )
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+    
+    #collection totals and breakdowns, all computed in sqlite
+    #with paths, only the cards of those sheets are counted
+    def summary(self, top_players: int = 10, paths: Optional[List[str]] = None) -> Dict:
+        where, args = '', ()
+        if paths is not None:
+            where, args = 'WHERE path IN (SELECT value FROM json_each(?))', (json.dumps([os.path.abspath(p) for p in paths]),)
+        
+        with self._lock:
+            total_cards, total_value = self._conn.execute(
+                f'SELECT COUNT(*), COALESCE(SUM(value), 0) FROM cards {where}', args
+            ).fetchone()
+            players = self._conn.execute(
+                f'SELECT player_name, COUNT(*) AS n FROM cards {where} GROUP BY player_name ORDER BY n DESC LIMIT ?',
+                (*args, top_players)
+            ).fetchall()
+            teams = self._conn.execute(
+                f'SELECT team, COUNT(*) AS n FROM cards {where} GROUP BY team ORDER BY n DESC', args
+            ).fetchall()
+            years = self._conn.execute(f'SELECT year, COUNT(*) FROM cards {where} GROUP BY year ORDER BY year', args).fetchall()
+        
+        return {
+            'total_cards': total_cards,
+            'total_estimated_value': round(total_value, 2),
+            'average_card_value': round(total_value / total_cards, 2) if total_cards else 0,
+            'top_players': players,
+            'teams': dict(teams),
+            'years': dict(years)
+        }
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+#shared collection index in data_dir, None when disabled
+def get_collection_index(config: Dict) -> Optional[CollectionIndex]:
+    global _collection_index
+    if not config.get('collection_index'):
+        return None
+    
+    with _collection_index_lock:
+        if _collection_index is None:
+            _collection_index = CollectionIndex(os.path.join(config['data_dir'], 'collection_index.sqlite'))
+        return _collection_index
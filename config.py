@@ -4,16 +4,75 @@ from dotenv import load_dotenv
 #load config from env file
 def load_config() -> dict:
     load_dotenv()
+    scrape_delay = int(os.getenv('SCRAPE_DELAY', 2))
     
     config = {
         'openai_api_key': os.getenv('OPENAI_API_KEY', ''),
         'google_api_key': os.getenv('GOOGLE_API_KEY', ''),
+        'openai_base_url': os.getenv('OPENAI_BASE_URL', ''),
+        'openai_model': os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo'),
+        'google_api_endpoint': os.getenv('GOOGLE_API_ENDPOINT', ''),
+        'google_model': os.getenv('GOOGLE_MODEL', 'gemini-pro'),
+        'llm_concurrency': int(os.getenv('LLM_CONCURRENCY', 4)),
+        'llm_batch_size': int(os.getenv('LLM_BATCH_SIZE', 1)),
+        'llm_max_retries': int(os.getenv('LLM_MAX_RETRIES', 5)),
+        'llm_backoff_base': float(os.getenv('LLM_BACKOFF_BASE', 1.0)),
+        'llm_backoff_max': float(os.getenv('LLM_BACKOFF_MAX', 30.0)),
+        'description_cache': os.getenv('DESCRIPTION_CACHE', 'true').lower() == 'true',
+        'description_cache_ttl_days': float(os.getenv('DESCRIPTION_CACHE_TTL_DAYS', 0)),
+        'description_cache_max_mb': int(os.getenv('DESCRIPTION_CACHE_MAX_MB', 64)),
         'user_agent': os.getenv('USER_AGENT', 'Mozilla/5.0'),
-        'scrape_delay': int(os.getenv('SCRAPE_DELAY', 2)),
+        'scrape_delay': scrape_delay,
+        'ebay_requests_per_sec': float(os.getenv('EBAY_REQUESTS_PER_SEC', 1 / scrape_delay if scrape_delay > 0 else 0)),
+        'bbref_requests_per_sec': float(os.getenv('BBREF_REQUESTS_PER_SEC', 0.5)),
+        'ebay_base_url': os.getenv('EBAY_BASE_URL', 'https://www.ebay.com'),
+        'bbref_base_url': os.getenv('BBREF_BASE_URL', 'https://www.baseball-reference.com'),
+        'http_max_retries': int(os.getenv('HTTP_MAX_RETRIES', 3)),
+        'http_backoff_base': float(os.getenv('HTTP_BACKOFF_BASE', 1.0)),
+        'http_backoff_max': float(os.getenv('HTTP_BACKOFF_MAX', 30.0)),
+        'enrich_cache': os.getenv('ENRICH_CACHE', 'true').lower() == 'true',
+        'enrich_cache_max_mb': int(os.getenv('ENRICH_CACHE_MAX_MB', 64)),
+        'price_cache_ttl_days': float(os.getenv('PRICE_CACHE_TTL_DAYS', 3)),
+        'stats_cache_ttl_days': float(os.getenv('STATS_CACHE_TTL_DAYS', 90)),
+        'miss_cache_ttl_days': float(os.getenv('MISS_CACHE_TTL_DAYS', 1)),
+        'player_index': os.getenv('PLAYER_INDEX', 'true').lower() == 'true',
+        'player_ids_csv': os.getenv('PLAYER_IDS_CSV', ''),
+        'revalue_max_age_days': float(os.getenv('REVALUE_MAX_AGE_DAYS', 30)),
+        'revalue_request_budget': int(os.getenv('REVALUE_REQUEST_BUDGET', 200)),
+        'stats_provider': os.getenv('STATS_PROVIDER', 'scrape'),
+        'lahman_dir': os.getenv('LAHMAN_DIR', ''),
+        'async_enrichment': os.getenv('ASYNC_ENRICHMENT', 'true').lower() == 'true',
+        'enrich_concurrency': int(os.getenv('ENRICH_CONCURRENCY', 8)),
         'tesseract_path': os.getenv('TESSERACT_PATH', '/usr/bin/tesseract'),
         'ocr_language': os.getenv('OCR_LANGUAGE', 'eng'),
+        'ocr_backend': os.getenv('OCR_BACKEND', 'pytesseract'),
         'card_grid_size': int(os.getenv('CARD_GRID_SIZE', 3)),
         'image_enhance_threshold': int(os.getenv('IMAGE_ENHANCE_THRESHOLD', 140)),
+        'ocr_roi': os.getenv('OCR_ROI', 'false').lower() == 'true',
+        'roi_header_lines': int(os.getenv('ROI_HEADER_LINES', 4)),
+        'roi_footer_lines': int(os.getenv('ROI_FOOTER_LINES', 5)),
+        'roi_header_psm': int(os.getenv('ROI_HEADER_PSM', 6)),
+        'roi_footer_psm': int(os.getenv('ROI_FOOTER_PSM', 6)),
+        'required_fields': [f.strip() for f in os.getenv('REQUIRED_FIELDS', 'player_name,year,manufacturer,card_code').split(',') if f.strip()],
+        'adaptive_threshold': os.getenv('ADAPTIVE_THRESHOLD', 'false').lower() == 'true',
+        'adaptive_methods': [m.strip() for m in os.getenv('ADAPTIVE_METHODS', 'otsu,120,160,adaptive').split(',') if m.strip()],
+        'adaptive_min_confidence': float(os.getenv('ADAPTIVE_MIN_CONFIDENCE', 70)),
+        'blank_min_ink': float(os.getenv('BLANK_MIN_INK', 0.005)),
+        'blank_max_ink': float(os.getenv('BLANK_MAX_INK', 0.6)),
+        'ocr_cache': os.getenv('OCR_CACHE', 'true').lower() == 'true',
+        'ocr_cache_max_mb': int(os.getenv('OCR_CACHE_MAX_MB', 256)),
+        'ocr_workers': int(os.getenv('OCR_WORKERS', os.cpu_count() or 1)),
+        'ocr_pool': os.getenv('OCR_POOL', 'thread'),
+        'reparse_workers': int(os.getenv('REPARSE_WORKERS', os.cpu_count() or 1)),
+        'sheet_workers': int(os.getenv('SHEET_WORKERS', 2)),
+        'enrich_sheet_workers': int(os.getenv('ENRICH_SHEET_WORKERS', 2)),
+        'grade_sheet_workers': int(os.getenv('GRADE_SHEET_WORKERS', 2)),
+        'resume': os.getenv('RESUME', 'false').lower() == 'true',
+        'pipeline_queue_size': int(os.getenv('PIPELINE_QUEUE_SIZE', 2)),
+        'pipeline_status_interval': float(os.getenv('PIPELINE_STATUS_INTERVAL', 10)),
+        'output_format': os.getenv('OUTPUT_FORMAT', 'json'),
+        'raw_text_store': os.getenv('RAW_TEXT_STORE', 'inline'),
+        'collection_index': os.getenv('COLLECTION_INDEX', 'true').lower() == 'true',
         'cardscans_dir': os.getenv('CARDSCANS_DIR', './cardscans'),
         'data_dir': os.getenv('DATA_DIR', './data'),
         'outputs_dir': os.getenv('OUTPUTS_DIR', './outputs'),
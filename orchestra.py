@@ -1,17 +1,157 @@
-import json
+import math
 import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import repeat
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 from config import load_config, validate_config, print_config
-from agent_1 import process_card_scan, save_cards_data
-from agent_2 import enrich_all_cards
+import agent_1
+import agent_2
+import agent_3
+from agent_1 import process_card_scan, parse_card_metadata, count_scan_pages, ocr_settings, PARSED_FIELDS
+from agent_2 import (enrich_all_cards, LookupCoalescer, LOOKUP_FAILED, lookup_price, normalize_query, record_price,
+                     record_price_miss, resolve_lookups, print_http_stats)
 from agent_3 import grade_all_cards
+from checkpoint import SheetCheckpoint, file_fingerprint, code_version, fingerprint
+from storage import save_sheet, load_sheet, load_header, list_sheets, sheet_exists
+from collection import get_collection_index
+
+#config that changes what each stage produces, part of its checkpoint fingerprint
+#(endpoints aren't: a mirror or proxy of the same service gives the same results)
+ENRICH_CONFIG_KEYS = ('stats_provider', 'lahman_dir', 'player_ids_csv')
+GRADE_CONFIG_KEYS = ('openai_model', 'google_model', 'llm_batch_size')
+
+#checkpoint fingerprint per stage: input image bytes, sheet metadata, stage config and stage code version
+#chained, so anything that invalidates ocr also invalidates enrichment and grading
+def stage_fingerprints(image_path: str, sheet_metadata: Dict, config: Dict, enable_enrichment: bool) -> Dict:
+    ocr = fingerprint('ocr', file_fingerprint(image_path), sheet_metadata, ocr_settings(config),
+                      config['card_grid_size'], config.get('blank_min_ink'), config.get('blank_max_ink'),
+                      code_version(agent_1))
+    enrich = fingerprint('enrich', ocr, {k: config.get(k) for k in ENRICH_CONFIG_KEYS}, code_version(agent_2))
+    grade = fingerprint('grade', enrich if enable_enrichment else ocr, {k: config.get(k) for k in GRADE_CONFIG_KEYS},
+                        bool(config.get('openai_api_key')), bool(config.get('google_api_key')),
+                        code_version(agent_3))
+    return {'ocr': ocr, 'enrich': enrich, 'grade': grade}
+
+#restore the cards an interrupted run of a stage already finished, returns the merged card list,
+#the cards still to process and the callback that checkpoints each one as it finishes
+def resume_cards(checkpoint: SheetCheckpoint, stage: str, stage_fingerprint: str, cards_data: List[Dict]):
+    done = checkpoint.load_partial(stage, stage_fingerprint)
+    cards_data = [done.get(i, card) for i, card in enumerate(cards_data)]
+    if done:
+        print(f"  resuming {stage}: {len(done)}/{len(cards_data)} cards already done")
+    
+    position = {id(card): i for i, card in enumerate(cards_data)}
+    pending = [card for i, card in enumerate(cards_data) if i not in done]
+    return cards_data, pending, lambda card: checkpoint.append(stage, stage_fingerprint, position[id(card)], card)
+
+#agent 1 stage: ocr a sheet and save the intermediate output
+#with a checkpoint, a current ocr output is reused and an interrupted run keeps the cards it already read
+def run_ocr_stage(image_path: str, sheet_metadata: Dict, config: Dict,
+                  checkpoint: Optional[SheetCheckpoint] = None, stage_fingerprint: str = '') -> List[Dict]:
+    sheet_id = sheet_metadata.get('sheet_id', 'sheet_001')
+    output_path = f"{config['data_dir']}/{sheet_id}_agent1_ocr.json"
+    if checkpoint and checkpoint.is_complete('ocr', stage_fingerprint):
+        print(f"\nagent 1: {sheet_id} checkpoint is current, skipping ocr")
+        return load_sheet(output_path)
+    
+    if checkpoint:
+        done_texts = checkpoint.load_partial('ocr', stage_fingerprint)
+        if done_texts:
+            print(f"  resuming ocr: {len(done_texts)} cards already read")
+        cards_data = process_card_scan(image_path, sheet_metadata, config, done_texts,
+                                       partial(checkpoint.append, 'ocr', stage_fingerprint))
+    else:
+        cards_data = process_card_scan(image_path, sheet_metadata, config)
+    
+    save_sheet(cards_data, output_path, config, sheet_metadata)
+    if checkpoint:
+        checkpoint.mark_complete('ocr', stage_fingerprint, output_path, len(cards_data))
+    return cards_data
+
+#agent 2 stage: web enrichment
+def run_enrich_stage(cards_data: List[Dict], sheet_metadata: Dict, config: Dict,
+                     coalescer: Optional[LookupCoalescer] = None,
+                     checkpoint: Optional[SheetCheckpoint] = None, stage_fingerprint: str = '') -> List[Dict]:
+    sheet_id = sheet_metadata.get('sheet_id', 'sheet_001')
+    output_path = f"{config['data_dir']}/{sheet_id}_agent2_enriched.json"
+    if checkpoint and checkpoint.is_complete('enrich', stage_fingerprint):
+        print(f"\nagent 2: {sheet_id} checkpoint is current, skipping enrichment")
+        return load_sheet(output_path)
+    
+    pending, on_card = cards_data, None
+    if checkpoint:
+        cards_data, pending, on_card = resume_cards(checkpoint, 'enrich', stage_fingerprint, cards_data)
+    
+    enrich_all_cards(pending, config, coalescer, on_card)
+    save_sheet(cards_data, output_path, config, sheet_metadata)
+    if checkpoint:
+        checkpoint.mark_complete('enrich', stage_fingerprint, output_path, len(cards_data))
+    return cards_data
+
+#agent 3 stage: grading and descriptions
+def run_grade_stage(cards_data: List[Dict], sheet_metadata: Dict, config: Dict,
+                    checkpoint: Optional[SheetCheckpoint] = None, stage_fingerprint: str = '') -> List[Dict]:
+    sheet_id = sheet_metadata.get('sheet_id', 'sheet_001')
+    output_path = f"{config['data_dir']}/{sheet_id}_agent3_graded.json"
+    if checkpoint and checkpoint.is_complete('grade', stage_fingerprint):
+        print(f"\nagent 3: {sheet_id} checkpoint is current, skipping grading")
+        return load_sheet(output_path)
+    
+    pending, on_card = cards_data, None
+    if checkpoint:
+        cards_data, pending, on_card = resume_cards(checkpoint, 'grade', stage_fingerprint, cards_data)
+    
+    grade_all_cards(pending, config, on_card)
+    save_sheet(cards_data, output_path, config, sheet_metadata)
+    if checkpoint:
+        checkpoint.mark_complete('grade', stage_fingerprint, output_path, len(cards_data))
+    return cards_data
+
+#build and save the final output for a sheet
+def write_final_output(cards_data: List[Dict], sheet_metadata: Dict, config: Dict,
+                       enable_enrichment: bool, enable_grading: bool) -> Dict:
+    final_output = {
+        'pipeline_timestamp': datetime.now().isoformat(),
+        'sheet_metadata': sheet_metadata,
+        'processing_config': {
+            'enrichment_enabled': enable_enrichment,
+            'grading_enabled': enable_grading
+        },
+        'cards': cards_data,
+        'summary': {
+            'total_cards': len(cards_data),
+            'empty_slots': sum(1 for c in cards_data if c.get('empty_slot')),
+            'cards_with_prices': sum(1 for c in cards_data if 'market_value' in c),
+            'cards_with_stats': sum(1 for c in cards_data if 'player_stats' in c),
+            'cards_with_grades': sum(1 for c in cards_data if 'condition_estimate' in c)
+        }
+    }
+    
+    #save final output
+    sheet_id = sheet_metadata.get('sheet_id', 'sheet_001')
+    final_path = f"{config['outputs_dir']}/{sheet_id}_final.json"
+    save_sheet(final_output, final_path, config)
+    index_final_output(final_path, final_output, config)
+    
+    return final_output
+
+#upsert a written final output into the collection index
+def index_final_output(path: str, final_output: Dict, config: Dict):
+    index = get_collection_index(config)
+    if index:
+        index.upsert_sheet(path, final_output)
 
 #orchestrate full pipeline from scan to final output
 def process_full_pipeline(image_path: str, 
                          sheet_metadata: Dict,
                          enable_enrichment: bool = True,
-                         enable_grading: bool = True) -> Dict:
+                         enable_grading: bool = True,
+                         resume: Optional[bool] = None) -> Dict:
     
     print("="*60)
     print("baseball card processing pipeline")
@@ -27,96 +167,429 @@ def process_full_pipeline(image_path: str,
         print(f"error: image not found at {image_path}")
         return None
     
-    #agent 1: ocr extraction
-    cards_data = process_card_scan(image_path, sheet_metadata, config)
+    #resume mode: stages with a current checkpoint are loaded instead of re-run
+    checkpoint, fingerprints = None, {}
+    if config['resume'] if resume is None else resume:
+        checkpoint = SheetCheckpoint(config['data_dir'], sheet_metadata.get('sheet_id', 'sheet_001'))
+        fingerprints = stage_fingerprints(image_path, sheet_metadata, config, enable_enrichment)
     
-    #save intermediate results
-    sheet_id = sheet_metadata.get('sheet_id', 'sheet_001')
-    agent1_output = f"{config['data_dir']}/{sheet_id}_agent1_ocr.json"
-    save_cards_data(cards_data, agent1_output)
+    #agent 1: ocr extraction
+    cards_data = run_ocr_stage(image_path, sheet_metadata, config, checkpoint, fingerprints.get('ocr', ''))
     
-    #agent 2: web enrichment (optional)
+    #agent 2: web enrichment (optional), identical price/stats lookups on the sheet are resolved once
     if enable_enrichment:
-        cards_data = enrich_all_cards(cards_data, config)
-        agent2_output = f"{config['data_dir']}/{sheet_id}_agent2_enriched.json"
-        save_cards_data(cards_data, agent2_output)
+        coalescer = LookupCoalescer()
+        cards_data = run_enrich_stage(cards_data, sheet_metadata, config, coalescer,
+                                      checkpoint, fingerprints.get('enrich', ''))
+        coalescer.print_summary()
     else:
         print("\nagent 2: skipped (enrichment disabled)")
     
     #agent 3: grading and descriptions (optional)
     if enable_grading:
-        cards_data = grade_all_cards(cards_data, config)
-        agent3_output = f"{config['data_dir']}/{sheet_id}_agent3_graded.json"
-        save_cards_data(cards_data, agent3_output)
+        cards_data = run_grade_stage(cards_data, sheet_metadata, config, checkpoint, fingerprints.get('grade', ''))
     else:
         print("\nagent 3: skipped (grading disabled)")
     
     #create final output
-    final_output = {
-        'pipeline_timestamp': datetime.now().isoformat(),
-        'sheet_metadata': sheet_metadata,
-        'processing_config': {
-            'enrichment_enabled': enable_enrichment,
-            'grading_enabled': enable_grading
-        },
-        'cards': cards_data,
-        'summary': {
-            'total_cards': len(cards_data),
-            'cards_with_prices': sum(1 for c in cards_data if 'market_value' in c),
-            'cards_with_stats': sum(1 for c in cards_data if 'player_stats' in c),
-            'cards_with_grades': sum(1 for c in cards_data if 'condition_estimate' in c)
-        }
-    }
-    
-    #save final output
-    final_path = f"{config['outputs_dir']}/{sheet_id}_final.json"
-    with open(final_path, 'w', encoding='utf-8') as f:
-        json.dump(final_output, f, indent=4, ensure_ascii=False)
+    final_output = write_final_output(cards_data, sheet_metadata, config, enable_enrichment, enable_grading)
+    sheet_id = sheet_metadata.get('sheet_id', 'sheet_001')
     
     print("\n" + "="*60)
     print(f"pipeline complete")
     print(f"processed {len(cards_data)} cards")
-    print(f"final output: {final_path}")
+    print(f"final output: {config['outputs_dir']}/{sheet_id}_final.json")
     print("="*60)
     
     return final_output
 
-#batch process multiple scans
-def process_batch(scan_configs: List[Dict],
-                 enable_enrichment: bool = True,
-                 enable_grading: bool = True) -> List[Dict]:
+#replace a card's parsed fields with a fresh parse, returns True if anything changed
+def merge_parsed_fields(card: Dict, parsed: Dict) -> bool:
+    old = {f: card.pop(f) for f in PARSED_FIELDS if f in card}
+    card.update(parsed)
+    return old != parsed
+
+#re-parse one sheet's stored ocr text and merge it into every stage output and the final output
+#runs in a worker process, each sheet's files are only touched by one worker
+def reparse_sheet(agent1_path: str, data_dir: str, outputs_dir: str, config: Optional[Dict] = None) -> Dict:
+    config = config or load_config()
+    sheet_id = os.path.basename(agent1_path)[:-len('_agent1_ocr.json')]
     
-    results = []
+    ocr_cards = load_sheet(agent1_path)
     
-    for i, scan_config in enumerate(scan_configs):
-        print(f"\n\nprocessing scan {i+1}/{len(scan_configs)}")
+    #fresh parse per card position, empty slots have nothing to parse
+    parsed_by_position = {}
+    for i, card in enumerate(ocr_cards):
+        if card.get('empty_slot') or not card.get('raw_text'):
+            continue
+        fresh = parse_card_metadata(card['raw_text'], i, {})
+        parsed_by_position[card['card_position']] = {f: fresh[f] for f in PARSED_FIELDS if f in fresh}
+    
+    changed = 0
+    for card in ocr_cards:
+        if card.get('card_position') in parsed_by_position:
+            changed += merge_parsed_fields(card, parsed_by_position[card['card_position']])
+    save_sheet(ocr_cards, agent1_path, config, load_header(agent1_path).get('sheet_metadata'))
+    
+    #later stages and final output get the same fields
+    later_paths = [
+        f"{data_dir}/{sheet_id}_agent2_enriched.json",
+        f"{data_dir}/{sheet_id}_agent3_graded.json",
+        f"{outputs_dir}/{sheet_id}_final.json"
+    ]
+    for path in later_paths:
+        if not sheet_exists(path):
+            continue
+        
+        data = load_sheet(path)
+        
+        cards = data['cards'] if isinstance(data, dict) else data
+        for card in cards:
+            if card.get('card_position') in parsed_by_position:
+                merge_parsed_fields(card, parsed_by_position[card['card_position']])
+        
+        if isinstance(data, dict):
+            data['reparse_timestamp'] = datetime.now().isoformat()
+        
+        save_sheet(data, path, config, load_header(path).get('sheet_metadata'))
+    
+    return {'sheet_id': sheet_id, 'cards': len(parsed_by_position), 'changed_cards': changed}
+
+#rebuild parsed card fields from stored ocr text with the current parser
+#no tesseract, no scraping, no llm: streams *_agent1_ocr outputs in data_dir across a process pool
+def reparse_archive(data_dir: Optional[str] = None, workers: Optional[int] = None) -> Dict:
+    config = load_config()
+    data_dir = data_dir or config['data_dir']
+    workers = workers or config['reparse_workers']
+    
+    print(f"re-parsing stored ocr text in {data_dir} with {workers} workers")
+    start = time.perf_counter()
+    
+    sheet_paths = list_sheets(data_dir, '_agent1_ocr.json')
+    totals = {'sheets': 0, 'cards': 0, 'changed_cards': 0}
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(reparse_sheet, sheet_paths, repeat(data_dir), repeat(config['outputs_dir']),
+                           repeat(config), chunksize=8)
+        for result in results:
+            totals['sheets'] += 1
+            totals['cards'] += result['cards']
+            totals['changed_cards'] += result['changed_cards']
+    
+    #the workers rewrote final outputs, re-index the ones that changed
+    index = get_collection_index(config)
+    if index:
+        index.sync(list_sheets(config['outputs_dir'], '_final.json'))
+    
+    totals['seconds'] = round(time.perf_counter() - start, 2)
+    print(f"re-parsed {totals['cards']} cards on {totals['sheets']} sheets in {totals['seconds']}s, "
+          f"{totals['changed_cards']} cards changed")
+    return totals
+
+#days since a card's price was fetched
+#prices from before retrieved_at was stamped are as old as the sheet's pipeline run
+#a search that found no sales (price_checked_at) counts as checked too
+def price_age_days(card: Dict, fallback_timestamp: str, now: datetime) -> float:
+    retrieved_at = (card.get('market_value') or {}).get('retrieved_at') or fallback_timestamp
+    checked = [t for t in (retrieved_at, card.get('price_checked_at')) if t]
+    try:
+        return min((now - datetime.fromisoformat(t)).total_seconds() / 86400 for t in checked)
+    except (TypeError, ValueError):
+        return float('inf')
+
+#refresh stale market values in existing *_final.json outputs, no ocr or grading
+#stale cards are ranked by age weighted by last known value (a $100 card ages ~3x faster than an unpriced one)
+#and only the top request_budget ebay searches run. identical cards across sheets share one search
+#outputs are read one sheet at a time: the ranking keeps only (path, card index) per stale card, and only the
+#sheets with a refreshed or checked card are loaded again to be written
+def revalue_collection(outputs_dir: Optional[str] = None,
+                       max_age_days: Optional[float] = None,
+                       request_budget: Optional[int] = None) -> Dict:
+    config = load_config()
+    outputs_dir = outputs_dir or config['outputs_dir']
+    max_age_days = config['revalue_max_age_days'] if max_age_days is None else max_age_days
+    request_budget = config['revalue_request_budget'] if request_budget is None else request_budget
+    now = datetime.now()
+    
+    #price key -> priority, the lookup arguments and the (path, card index) pairs it covers
+    candidates = {}
+    for path in list_sheets(outputs_dir, '_final.json'):
+        data = load_sheet(path, with_raw_text=False)
+        
+        for i, card in enumerate(data.get('cards', [])):
+            if card.get('empty_slot') or not card.get('player_name'):
+                continue
+            
+            age = price_age_days(card, data.get('pipeline_timestamp'), now)
+            if age < max_age_days:
+                continue
+            
+            value = (card.get('market_value') or {}).get('avg_sold_price') or 0
+            lookup_args = (card['player_name'], card.get('year', ''), card.get('manufacturer', ''))
+            key = ('price', normalize_query(lookup_args[1], lookup_args[2], lookup_args[0]))
+            entry = candidates.setdefault(key, {'priority': 0, 'lookup_args': lookup_args, 'cards': []})
+            entry['priority'] = max(entry['priority'], age * (1 + math.log10(1 + value)))
+            entry['cards'].append((path, i))
+    
+    per_lookup = LookupCoalescer.REQUESTS_PER_LOOKUP['price']
+    ranked = sorted(candidates.items(), key=lambda item: item[1]['priority'], reverse=True)
+    selected = ranked[:max(0, request_budget) // per_lookup]
+    stale_cards = sum(len(entry['cards']) for _, entry in ranked)
+    print(f"revaluing {outputs_dir}: {stale_cards} cards priced over {max_age_days:g} days ago "
+          f"({len(ranked)} distinct), refreshing {len(selected)} within a budget of {request_budget} requests")
+    
+    #always a fresh search, the new price still goes into the enrichment cache
+    jobs = {}
+    for key, entry in selected:
+        lookup = partial(lookup_price, *entry['lookup_args'], config, refresh=True, report_failure=True)
+        jobs[key] = (lookup, len(entry['cards']))
+    
+    start = time.perf_counter()
+    results = resolve_lookups(jobs, LookupCoalescer(), config)
+    
+    #path -> card index -> lookup key, every card whose search ran gets either the new price or a checked stamp
+    #cards whose search failed are left as they were, still stale for the next run
+    updates = {}
+    for key, entry in selected:
+        if results[key] is LOOKUP_FAILED:
+            continue
+        for path, i in entry['cards']:
+            updates.setdefault(path, {})[i] = key
+    
+    totals = {'sheets': 0, 'stale_cards': stale_cards, 'lookups': len(jobs), 'refreshed_cards': 0,
+              'not_found': sum(1 for key, _ in selected if results[key] is None),
+              'failed': sum(1 for key, _ in selected if results[key] is LOOKUP_FAILED)}
+    
+    #write the sheets back in place, one at a time
+    for path in sorted(updates):
+        data = load_sheet(path)
+        for i, key in updates[path].items():
+            card = data['cards'][i]
+            if results[key]:
+                record_price(card, results[key], data.get('pipeline_timestamp', ''))
+                totals['refreshed_cards'] += 1
+            else:
+                record_price_miss(card, now.isoformat(), data.get('pipeline_timestamp', ''))
         
+        data['revalue_timestamp'] = now.isoformat()
+        if 'summary' in data:
+            data['summary']['cards_with_prices'] = sum(1 for c in data['cards'] if 'market_value' in c)
+        save_sheet(data, path, config)
+        index_final_output(path, data, config)
+    totals['sheets'] = len(updates)
+    
+    totals['seconds'] = round(time.perf_counter() - start, 2)
+    print(f"refreshed {totals['refreshed_cards']} cards on {totals['sheets']} sheets in {totals['seconds']}s, "
+          f"{totals['not_found']} lookups found no sales, {totals['failed']} failed")
+    print_http_stats()
+    return totals
+
+#split multi-page scans (tiff binder exports) into one scan config per page
+#each page becomes its own sheet: sheet_id gets a _pNNN suffix and sheet_metadata a page_index
+def expand_multipage_scans(scan_configs: List[Dict]) -> List[Dict]:
+    expanded = []
+    for i, scan_config in enumerate(scan_configs):
         image_path = scan_config['image_path']
         sheet_metadata = scan_config.get('sheet_metadata', {
             'sheet_id': f'sheet_{i+1:03d}',
             'scan_date': datetime.now().strftime('%Y-%m-%d')
         })
         
-        result = process_full_pipeline(
-            image_path,
-            sheet_metadata,
-            enable_enrichment,
-            enable_grading
-        )
+        num_pages = count_scan_pages(image_path) if os.path.exists(image_path) else 1
+        if num_pages == 1:
+            expanded.append({**scan_config, 'sheet_metadata': sheet_metadata})
+            continue
         
-        if result:
-            results.append(result)
+        print(f"{image_path}: {num_pages} pages, one sheet per page")
+        for page_index in range(num_pages):
+            page_metadata = sheet_metadata.copy()
+            page_metadata['sheet_id'] = f"{sheet_metadata.get('sheet_id', f'sheet_{i+1:03d}')}_p{page_index+1:03d}"
+            page_metadata['page_index'] = page_index
+            expanded.append({**scan_config, 'sheet_metadata': page_metadata})
+    
+    return expanded
+
+#one stage of the batch pipeline: a bounded input queue drained by the stage's own worker threads
+#workers block when the next stage's queue is full, so a slow stage holds back the ones before it
+#instead of piling sheets up in memory
+class PipelineStage:
+    _STOP = object()
     
-    return results
+    def __init__(self, name: str, work, workers: int, queue_size: int):
+        self.name = name
+        self.work = work
+        self.workers = max(1, workers)
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.done = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+        self._stops_queued = 0
+        self._threads = []
+    
+    #start workers, each finished sheet is handed to output (the next stage's put, or the result list)
+    def start(self, output):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, args=(output,), name=f'{self.name}-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def put(self, sheet: Dict):
+        self.queue.put(sheet)
+    
+    #no more sheets: one stop marker per worker behind the queued sheets, every worker drains the queue and exits
+    def finish(self):
+        for _ in self._threads:
+            with self._lock:
+                self._stops_queued += 1
+            self.queue.put(self._STOP)
+        for thread in self._threads:
+            thread.join()
+    
+    def _run(self, output):
+        while True:
+            sheet = self.queue.get()
+            if sheet is self._STOP:
+                with self._lock:
+                    self._stops_queued -= 1
+                return
+            
+            start = time.perf_counter()
+            try:
+                self.work(sheet)
+                ok = True
+            except Exception as e:
+                print(f"error: {self.name} failed on {sheet['sheet_metadata'].get('sheet_id')}: {e}")
+                ok = False
+            
+            with self._lock:
+                self.busy_seconds += time.perf_counter() - start
+                self.done += ok
+                self.failed += not ok
+            if ok:
+                output(sheet)
+    
+    #queue depth, finished sheets and throughput since the pipeline started
+    def status(self, elapsed: float) -> Dict:
+        with self._lock:
+            return {
+                'queued': max(0, self.queue.qsize() - self._stops_queued),
+                'done': self.done,
+                'failed': self.failed,
+                'sheets_per_min': round(self.done / elapsed * 60, 2) if elapsed else 0,
+                'utilization': round(self.busy_seconds / (elapsed * self.workers), 2) if elapsed else 0
+            }
+
+def print_pipeline_status(stages: List[PipelineStage], elapsed: float):
+    parts = []
+    for stage in stages:
+        status = stage.status(elapsed)
+        parts.append(f"{stage.name}: {status['queued']} queued, {status['done']} done, "
+                     f"{status['sheets_per_min']} sheets/min, {status['utilization']:.0%} busy")
+    print(f"[pipeline {elapsed:.0f}s] " + ' | '.join(parts))
+
+#batch process multiple scans
+#ocr, enrichment and grading run as a streaming pipeline: each stage has its own workers and a bounded queue
+#in front of it, so while sheet n is being enriched sheet n+1 is already in ocr and sheet n-1 is being graded
+def process_batch(scan_configs: List[Dict],
+                 enable_enrichment: bool = True,
+                 enable_grading: bool = True,
+                 resume: Optional[bool] = None) -> List[Dict]:
+    
+    config = load_config()
+    resume = config['resume'] if resume is None else resume
+    print_config(config)
+    validate_config(config, require_api_keys=enable_grading)
+    scan_configs = expand_multipage_scans(scan_configs)
+    queue_size = config['pipeline_queue_size']
+    
+    #identical price/stats lookups are resolved once for the whole batch
+    coalescer = LookupCoalescer()
+    
+    #each stage updates the sheet in place: sheet = {index, image_path, sheet_metadata, cards_data}
+    #plus a checkpoint and stage fingerprints in resume mode
+    def ocr(sheet):
+        sheet['checkpoint'], sheet['fingerprints'] = None, {}
+        if resume:
+            sheet_id = sheet['sheet_metadata'].get('sheet_id', 'sheet_001')
+            sheet['checkpoint'] = SheetCheckpoint(config['data_dir'], sheet_id)
+            sheet['fingerprints'] = stage_fingerprints(sheet['image_path'], sheet['sheet_metadata'], config,
+                                                       enable_enrichment)
+        sheet['cards_data'] = run_ocr_stage(sheet['image_path'], sheet['sheet_metadata'], config,
+                                            sheet['checkpoint'], sheet['fingerprints'].get('ocr', ''))
+    
+    def enrich(sheet):
+        sheet['cards_data'] = run_enrich_stage(sheet['cards_data'], sheet['sheet_metadata'], config, coalescer,
+                                               sheet['checkpoint'], sheet['fingerprints'].get('enrich', ''))
+    
+    def grade(sheet):
+        sheet['cards_data'] = run_grade_stage(sheet['cards_data'], sheet['sheet_metadata'], config,
+                                              sheet['checkpoint'], sheet['fingerprints'].get('grade', ''))
+    
+    def finalize(sheet):
+        sheet['result'] = write_final_output(sheet['cards_data'], sheet['sheet_metadata'], config,
+                                             enable_enrichment, enable_grading)
+        print(f"sheet complete: {sheet['sheet_metadata'].get('sheet_id')} ({len(sheet['cards_data'])} cards)")
+    
+    stages = [PipelineStage('ocr', ocr, config['sheet_workers'], queue_size)]
+    if enable_enrichment:
+        stages.append(PipelineStage('enrich', enrich, config['enrich_sheet_workers'], queue_size))
+    if enable_grading:
+        stages.append(PipelineStage('grade', grade, config['grade_sheet_workers'], queue_size))
+    stages.append(PipelineStage('output', finalize, 1, queue_size))
+    
+    finished = []
+    for stage, next_stage in zip(stages, stages[1:]):
+        stage.start(next_stage.put)
+    stages[-1].start(finished.append)
+    
+    #periodic queue depth / throughput line
+    start = time.perf_counter()
+    stop = threading.Event()
+    def monitor():
+        while not stop.wait(config['pipeline_status_interval']):
+            print_pipeline_status(stages, time.perf_counter() - start)
+    threading.Thread(target=monitor, daemon=True).start()
+    
+    #feeding blocks once the ocr queue is full
+    for i, scan_config in enumerate(scan_configs):
+        if not os.path.exists(scan_config['image_path']):
+            print(f"error: image not found at {scan_config['image_path']}")
+            continue
+        stages[0].put({'index': i, 'image_path': scan_config['image_path'],
+                       'sheet_metadata': scan_config['sheet_metadata']})
+    
+    #drain stage by stage, a stage only finishes once everything before it has handed over its sheets
+    for stage in stages:
+        stage.finish()
+    stop.set()
+    
+    elapsed = time.perf_counter() - start
+    print(f"\nbatch complete: {len(finished)}/{len(scan_configs)} sheets in {elapsed:.1f}s")
+    print_pipeline_status(stages, elapsed)
+    if enable_enrichment:
+        coalescer.print_summary()
+    
+    return [sheet['result'] for sheet in sorted(finished, key=lambda sheet: sheet['index'])]
 
 #generate collection summary from all processed cards
-def generate_collection_summary(output_files: List[str]) -> Dict:
-    all_cards = []
+#answered by the collection index: output_files (default: every final output in outputs_dir) that are new or
+#changed since they were indexed are upserted first, then the counts are sqlite aggregates over those sheets
+def generate_collection_summary(output_files: Optional[List[str]] = None, config: Optional[Dict] = None) -> Dict:
+    config = config or load_config()
+    index = get_collection_index(config)
+    if index:
+        if output_files is None:
+            index.sync(list_sheets(config['outputs_dir'], '_final.json'), prune=True)
+            return index.summary()
+        index.sync(output_files)
+        return index.summary(paths=output_files)
     
-    for file_path in output_files:
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-            all_cards.extend(data.get('cards', []))
+    #index disabled, re-read every output
+    all_cards = []
+    for file_path in list_sheets(config['outputs_dir'], '_final.json') if output_files is None else output_files:
+        data = load_sheet(file_path, with_raw_text=False)
+        all_cards.extend(c for c in data.get('cards', []) if not c.get('empty_slot'))
     
     #calculate collection stats
     total_value = 0
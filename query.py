@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
+from config import load_config
+from collection import get_collection_index, card_fields, card_value, CARD_FIELDS
+from storage import list_sheets, load_sheet
+
+#fields cards can be looked up by, and the orders results can be sorted in
+INDEXED_FIELDS = ('player_name', 'team', 'year', 'manufacturer', 'card_code', 'binder_page')
+SORT_FIELDS = ('value',) + INDEXED_FIELDS
+
+#lookup key for a field value: case and spacing don't matter, 2012 and '2012' are the same year
+def index_key(value) -> str:
+    return ' '.join(str(value).lower().split()) if value is not None else ''
+
+#in-memory catalog of cataloged cards for fast lookups
+#each indexed field maps key -> card ids, and every sort field has a precomputed order (plus each card's rank in
+#it), so a query walks the shortest matching id list and sorts the matches by rank, no scan of the collection
+#records hold the indexed fields and value, the full card is kept as loaded (dict or json text) for card()
+class CardCatalog:
+    def __init__(self):
+        self.records = []
+        self._cards = []
+        self._indexes = {field: {} for field in INDEXED_FIELDS}
+        self._keys = {field: [] for field in INDEXED_FIELDS}
+        self._orders = {}
+        self._ranks = {}
+        self._sorted_values = []
+    
+    def __len__(self) -> int:
+        return len(self.records)
+    
+    def add(self, record: Dict, card=None):
+        card_id = len(self.records)
+        record['id'] = card_id
+        self.records.append(record)
+        self._cards.append(card)
+        for field in INDEXED_FIELDS:
+            key = index_key(record.get(field))
+            self._keys[field].append(key)
+            self._indexes[field].setdefault(key, []).append(card_id)
+        self._orders = {}
+    
+    #sort orders for every sort field, built once after loading (add() drops them)
+    def build(self):
+        ids = range(len(self.records))
+        for field in SORT_FIELDS:
+            if field == 'value':
+                order = sorted(ids, key=lambda i: self.records[i]['value'])
+            else:
+                order = sorted(ids, key=self._keys[field].__getitem__)
+            rank = [0] * len(order)
+            for position, card_id in enumerate(order):
+                rank[card_id] = position
+            self._orders[field] = order
+            self._ranks[field] = rank
+        self._sorted_values = [self.records[i]['value'] for i in self._orders['value']]
+    
+    #full card for a card id
+    def card(self, card_id: int) -> Dict:
+        card = self._cards[card_id]
+        if isinstance(card, str):
+            card = json.loads(card)
+        return card if card is not None else self.records[card_id]
+    
+    #cards matching every given field (exact, case-insensitive) and the value range, sorted by a sort field
+    #e.g. query(team='Padres', year=2012, min_value=5) or query(card_code='W78701223')
+    def query(self, min_value: Optional[float] = None, max_value: Optional[float] = None, sort: str = 'value',
+              descending: bool = True, limit: Optional[int] = None, **filters) -> List[Dict]:
+        unknown = set(filters) - set(INDEXED_FIELDS)
+        if unknown:
+            raise ValueError(f"can't query by {', '.join(sorted(unknown))}, indexed fields: {', '.join(INDEXED_FIELDS)}")
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"can't sort by {sort}, sort fields: {', '.join(SORT_FIELDS)}")
+        if not self._orders:
+            self.build()
+        
+        wanted = {field: index_key(value) for field, value in filters.items() if value is not None}
+        records = self.records
+        
+        def in_range(card_id: int) -> bool:
+            value = records[card_id]['value']
+            return (min_value is None or value >= min_value) and (max_value is None or value <= max_value)
+        
+        if wanted:
+            #walk the smallest posting list, the other fields are checked against each card's keys
+            field = min(wanted, key=lambda f: len(self._indexes[f].get(wanted[f], ())))
+            matches = self._indexes[field].get(wanted[field], [])
+            for other, key in wanted.items():
+                if other != field:
+                    keys = self._keys[other]
+                    matches = [card_id for card_id in matches if keys[card_id] == key]
+            if min_value is not None or max_value is not None:
+                matches = [card_id for card_id in matches if in_range(card_id)]
+            else:
+                matches = list(matches)
+            matches.sort(key=self._ranks[sort].__getitem__, reverse=descending)
+            matches = matches[:limit] if limit else matches
+        elif sort == 'value':
+            #whole collection by value: the range is a slice of the value order
+            low = bisect_left(self._sorted_values, min_value) if min_value is not None else 0
+            high = bisect_right(self._sorted_values, max_value) if max_value is not None else len(records)
+            if limit:
+                low, high = (max(low, high - limit), high) if descending else (low, min(high, low + limit))
+            matches = self._orders['value'][low:high]
+            matches = matches[::-1] if descending else matches
+        else:
+            #whole collection in another order: walk it until the limit is filled
+            order = reversed(self._orders[sort]) if descending else self._orders[sort]
+            matches = []
+            for card_id in order:
+                if in_range(card_id):
+                    matches.append(card_id)
+                    if limit and len(matches) >= limit:
+                        break
+        
+        return [records[card_id] for card_id in matches]
+
+def card_record(card: Dict, sheet_id: Optional[str]) -> Dict:
+    record = {'sheet_id': sheet_id, **card_fields(card)}
+    record['value'] = card_value(card)
+    return record
+
+#catalog of every card in the final outputs
+#read from the collection index (synced with outputs_dir first) when it's enabled, otherwise from the outputs
+def load_catalog(config: Optional[Dict] = None) -> CardCatalog:
+    config = config or load_config()
+    catalog = CardCatalog()
+    output_paths = list_sheets(config['outputs_dir'], '_final.json')
+    
+    index = get_collection_index(config)
+    if index:
+        index.sync(output_paths, prune=True)
+        columns = ('sheet_id',) + CARD_FIELDS + ('value',)
+        for row in index.iter_cards():
+            catalog.add(dict(zip(columns, row[:-1])), row[-1])
+    else:
+        for path in output_paths:
+            data = load_sheet(path, with_raw_text=False)
+            sheet_id = data.get('sheet_metadata', {}).get('sheet_id')
+            for card in data.get('cards', []):
+                if not card.get('empty_slot'):
+                    catalog.add(card_record(card, sheet_id), card)
+    
+    catalog.build()
+    return catalog
+
+def print_results(results: List[Dict]):
+    for record in results:
+        print(f"${record['value']:>9.2f}  {record.get('year') or '':<7} {record.get('manufacturer') or '':<10} "
+              f"{record.get('player_name') or '':<24} {record.get('team') or '':<16} {record.get('card_code') or '':<12} "
+              f"{record.get('binder_page') or record.get('sheet_id') or ''} / {record.get('card_position') or ''}")
+
+#query the cataloged collection from the command line
+#python query.py --team Padres --year 2012 --min-value 5
+#python query.py --card-code W78701223
+def main():
+    parser = argparse.ArgumentParser(description='query cataloged cards')
+    for field in INDEXED_FIELDS:
+        parser.add_argument(f"--{field.replace('_name', '').replace('_', '-')}", dest=field)
+    parser.add_argument('--min-value', type=float)
+    parser.add_argument('--max-value', type=float)
+    parser.add_argument('--sort', choices=SORT_FIELDS, default='value')
+    parser.add_argument('--ascending', action='store_true')
+    parser.add_argument('--limit', type=int, default=20, help='0 for every match')
+    parser.add_argument('--json', action='store_true', help='print the full cards as json')
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    catalog = load_catalog()
+    print(f"loaded {len(catalog)} cards in {time.perf_counter() - start:.2f}s")
+    
+    start = time.perf_counter()
+    results = catalog.query(min_value=args.min_value, max_value=args.max_value, sort=args.sort,
+                            descending=not args.ascending, limit=args.limit,
+                            **{field: getattr(args, field) for field in INDEXED_FIELDS})
+    elapsed = time.perf_counter() - start
+    
+    if args.json:
+        print(json.dumps([catalog.card(record['id']) for record in results], indent=4, ensure_ascii=False))
+    else:
+        print_results(results)
+    print(f"{len(results)} cards in {elapsed * 1000:.3f} ms")
+
+if __name__ == "__main__":
+    main()
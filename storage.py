@@ -0,0 +1,230 @@
+import glob
+import gzip
+import io
+import json
+import os
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Union
+
+#sheet outputs (stage card lists and final outputs) in one of three layouts, all addressed by their json path:
+#  json:    <name>.json, indented, every card carrying the sheet metadata (the original layout)
+#  jsonl:   <name>.meta.json with the sheet metadata and header fields once + <name>.cards.jsonl, one card per line
+#  parquet: <name>.meta.json + <name>.cards.parquet, one row per card (needs pyarrow)
+#in the compact layouts a card only stores the fields that differ from the sheet metadata, and raw_text can go
+#to <name>.raw_text.jsonl.gz next to it
+#load_sheet rebuilds the original dicts from any layout
+OUTPUT_FORMATS = ('json', 'jsonl', 'parquet')
+
+def meta_path(path: str) -> str:
+    return f"{path[:-len('.json')]}.meta.json"
+
+def cards_path(path: str, output_format: str) -> str:
+    return f"{path[:-len('.json')]}.cards.{output_format}"
+
+#True if the sheet output exists in any layout
+def sheet_exists(path: str) -> bool:
+    return os.path.exists(path) or os.path.exists(meta_path(path))
+
+#modification time of a sheet output, whichever layout it's in (the meta file for the compact ones)
+def sheet_mtime(path: str) -> float:
+    return os.path.getmtime(path if os.path.exists(path) else meta_path(path))
+
+#json paths of every sheet output in a directory matching a suffix (e.g. '_final.json'), any layout
+def list_sheets(directory: str, suffix: str) -> List[str]:
+    paths = set(glob.glob(os.path.join(directory, f'*{suffix}')))
+    meta_suffix = meta_path(suffix)
+    paths.update(p[:-len(meta_suffix)] + suffix for p in glob.glob(os.path.join(directory, f'*{meta_suffix}')))
+    return sorted(paths)
+
+def raw_text_path(path: str) -> str:
+    return f"{path[:-len('.json')]}.raw_text.jsonl.gz"
+
+#write a file through a temp file that is fsynced and renamed over the target, so readers and a crash
+#only ever see the old or the new file. yields a text stream ('w', utf-8) or a binary one ('wb'),
+#gzip-compressed with compress=True
+@contextmanager
+def atomic_open(path: str, mode: str = 'w', compress: bool = False):
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'wb') as raw:
+            stream = gzip.GzipFile(fileobj=raw, mode='wb') if compress else raw
+            f = io.TextIOWrapper(stream, encoding='utf-8') if mode == 'w' else stream
+            yield f
+            
+            f.flush()
+            if f is not stream:
+                f.detach()
+            if compress:
+                stream.close()
+            raw.flush()
+            os.fsync(raw.fileno())
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+def write_json_atomic(path: str, data, indent: Optional[int] = 4):
+    with atomic_open(path) as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+
+#remove the other layouts of an output so a format switch never leaves two versions behind,
+#the raw text store goes too unless this save wrote it
+def _remove_other_layouts(path: str, output_format: str, raw_text_file: Optional[str] = None):
+    stale = [cards_path(path, fmt) for fmt in OUTPUT_FORMATS[1:] if fmt != output_format]
+    stale += [meta_path(path)] if output_format == 'json' else [path]
+    if not raw_text_file:
+        stale.append(raw_text_path(path))
+    for candidate in stale:
+        if os.path.exists(candidate):
+            os.remove(candidate)
+
+#card fields that aren't a copy of the sheet metadata
+def strip_sheet_metadata(card: Dict, sheet_metadata: Dict) -> Dict:
+    return {k: v for k, v in card.items() if k not in sheet_metadata or sheet_metadata[k] != v}
+
+#write a card list or a final output dict ({..., 'sheet_metadata', 'cards'}) in the configured layout
+def save_sheet(data: Union[List[Dict], Dict], path: str, config: Dict, sheet_metadata: Optional[Dict] = None):
+    output_format = config.get('output_format', 'json')
+    if output_format == 'parquet':
+        try:
+            import pyarrow
+        except ImportError:
+            print("parquet output needs pyarrow (pip install pyarrow), writing jsonl")
+            output_format = 'jsonl'
+    
+    cards = data['cards'] if isinstance(data, dict) else data
+    if output_format == 'json':
+        write_json_atomic(path, data)
+        _remove_other_layouts(path, output_format)
+        print(f"saved {len(cards)} cards to {path}")
+        return
+    
+    if isinstance(data, dict):
+        sheet_metadata = data.get('sheet_metadata', sheet_metadata)
+    sheet_metadata = sheet_metadata or {}
+    rows = [strip_sheet_metadata(card, sheet_metadata) for card in cards]
+    
+    #raw text out of the rows into the output's gzip store, a None placeholder keeps the key order
+    raw_text_file = None
+    if config.get('raw_text_store', 'inline') == 'separate' and any('raw_text' in row for row in rows):
+        raw_text_file = os.path.basename(raw_text_path(path))
+        texts = []
+        for i, row in enumerate(rows):
+            if row.get('raw_text') is not None:
+                texts.append({'index': i, 'raw_text': row['raw_text']})
+                row['raw_text'] = None
+        save_raw_texts(raw_text_path(path), texts)
+    
+    target = cards_path(path, output_format)
+    if output_format == 'jsonl':
+        with atomic_open(target) as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
+    else:
+        with atomic_open(target, 'wb') as f:
+            write_parquet(rows, f)
+    
+    header = {k: v for k, v in data.items() if k != 'cards'} if isinstance(data, dict) else {}
+    header.update({
+        'layout': {'format': output_format, 'cards': os.path.basename(target), 'raw_text': raw_text_file,
+                   'card_count': len(rows), 'keys': list(data) if isinstance(data, dict) else None},
+        'sheet_metadata': sheet_metadata
+    })
+    write_json_atomic(meta_path(path), header, indent=None)
+    _remove_other_layouts(path, output_format, raw_text_file)
+    print(f"saved {len(cards)} cards to {target}")
+
+#rows as a parquet table, one column per field, written to a path or a binary file
+#nested values (market_value, player_stats, ...) and fields whose type varies between cards are stored as json text
+def write_parquet(rows: List[Dict], path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    #column order follows first appearance, a card's missing fields are nulls
+    #an explicit None is a value too, so those columns go to json text where it's stored as 'null'
+    types = {}
+    for row in rows:
+        for k, v in row.items():
+            types.setdefault(k, set()).add(type(v))
+    json_columns = [k for k, seen in types.items() if len(seen) > 1 or seen & {dict, list, type(None)}]
+    
+    columns = {}
+    for k in types:
+        if k in json_columns:
+            values = [json.dumps(row[k], ensure_ascii=False) if k in row else None for row in rows]
+        else:
+            values = [row.get(k) for row in rows]
+        columns[k] = pa.array(values)
+    
+    table = pa.table(columns)
+    pq.write_table(table.replace_schema_metadata({'json_columns': json.dumps(json_columns)}), path)
+
+#rows back from write_parquet, fields a card didn't have come back as nulls and are dropped
+def read_parquet(path: str) -> List[Dict]:
+    import pyarrow.parquet as pq
+    
+    table = pq.read_table(path)
+    json_columns = set(json.loads((table.schema.metadata or {}).get(b'json_columns', b'[]')))
+    return [{k: json.loads(v) if k in json_columns else v for k, v in record.items() if v is not None}
+            for record in table.to_pylist()]
+
+def save_raw_texts(path: str, texts: List[Dict]):
+    with atomic_open(path, compress=True) as f:
+        for record in texts:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+#card index -> raw text
+def load_raw_texts(path: str) -> Dict[int, str]:
+    texts = {}
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            texts[record['index']] = record['raw_text']
+    return texts
+
+#header of a sheet output (everything but the cards), without reading the cards
+def load_header(path: str) -> Dict:
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return {k: v for k, v in data.items() if k != 'cards'} if isinstance(data, dict) else {}
+    
+    with open(meta_path(path), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+#load a sheet output in its original shape, whatever layout it was written in
+#with_raw_text=False skips the separate raw text store (raw_text stays None)
+def load_sheet(path: str, with_raw_text: bool = True) -> Union[List[Dict], Dict]:
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    header = load_header(path)
+    layout = header.pop('layout')
+    directory = os.path.dirname(path)
+    target = os.path.join(directory, layout['cards'])
+    
+    if layout['format'] == 'parquet':
+        rows = read_parquet(target)
+    else:
+        with open(target, 'r', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    
+    texts = {}
+    if layout.get('raw_text') and with_raw_text:
+        texts = load_raw_texts(os.path.join(directory, layout['raw_text']))
+    
+    sheet_metadata = header.get('sheet_metadata', {})
+    cards = []
+    for i, row in enumerate(rows):
+        card = sheet_metadata.copy()
+        card.update(row)
+        if i in texts:
+            card['raw_text'] = texts[i]
+        cards.append(card)
+    
+    if layout['keys'] is None:
+        return cards
+    header['cards'] = cards
+    return {k: header[k] for k in layout['keys'] if k in header}